@@ -1,18 +1,45 @@
 import os
-import requests
+import httpx
+import numpy as np
 import asyncio
 import logging
+import queue
+import atexit
+import contextvars
+from logging.handlers import QueueHandler, QueueListener, BaseRotatingHandler
+import gzip
+import shutil
 import time
 import json
 import sys
+import threading
 import codecs
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
 from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import RetryAfter
 from telegram.ext import Application, CommandHandler, ContextTypes, CallbackQueryHandler
 from typing import Dict, List, Optional, Tuple
-import hashlib
-from collections import defaultdict
+import io
+import zlib
+import sqlite3
+import math
+import operator
+import re
+from functools import reduce, lru_cache
+from email.utils import parsedate_to_datetime
+from collections import defaultdict, OrderedDict
+from bisect import bisect_left, insort
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
 
 # ===== FIX UNICODE ENCODING ISSUE =====
 # Set environment variable to use UTF-8 encoding
@@ -41,6 +68,76 @@ MAX_MARKET_CAP = int(os.getenv("MAX_MARKET_CAP", 50000))
 CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", 7))
 MAX_TOKEN_AGE_MINUTES = int(os.getenv("MAX_TOKEN_AGE_MINUTES", 30))
 QUERY_LIMIT = int(os.getenv("QUERY_LIMIT", 7))
+# Alerted pairs are remembered until they age out of the rules' age limit; pairs without
+# a creation time (or any pair, when no rule limits age) use this TTL instead
+SEEN_PAIRS_TTL_MINUTES = float(os.getenv("SEEN_PAIRS_TTL_MINUTES", 24 * 60))
+SEEN_PAIRS_MAX = int(os.getenv("SEEN_PAIRS_MAX", 5000))
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "solana_bot_state.db")
+# Scan pipeline: source batches waiting to be filtered
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 4))
+
+RULES_FILE = os.getenv("RULES_FILE", "filter_rules.json")
+
+# Built-in filter and risk rules, used when RULES_FILE does not exist.
+# Filters are rejection predicates: a pair is dropped when any of them matches.
+# Leaves compare a PairColumns column against a number, a boolean or a $SETTING.
+DEFAULT_RULES = {
+    'filters': [
+        {'name': "Missing base token data", 'column': 'has_base', 'op': '==', 'value': False},
+        {'name': "Not a Solana pair", 'column': 'is_solana', 'op': '==', 'value': False},
+        {'name': "No market cap or price data", 'all': [
+            {'column': 'market_cap', 'op': '==', 'value': 0},
+            {'column': 'price_usd', 'op': '<=', 'value': 0}
+        ]},
+        {'name': "Market cap outside range", 'all': [
+            {'column': 'market_cap', 'op': '>', 'value': 0},
+            {'any': [
+                {'column': 'market_cap', 'op': '<', 'value': '$MIN_MARKET_CAP'},
+                {'column': 'market_cap', 'op': '>', 'value': '$MAX_MARKET_CAP'}
+            ]}
+        ]},
+        # Unknown ages are NaN and never match
+        {'name': "Too old", 'column': 'age_minutes', 'op': '>', 'value': '$MAX_TOKEN_AGE_MINUTES'},
+        {'name': "Invalid timestamp", 'column': 'age_minutes', 'op': '<', 'value': 0},
+        {'name': "Low volume", 'column': 'volume_24h', 'op': '<', 'value': 100},
+        {'name': "No valid price data", 'column': 'price_usd', 'op': '<=', 'value': 0},
+        {'name': "Low liquidity", 'all': [
+            {'column': 'liquidity_valid', 'op': '==', 'value': True},
+            {'column': 'liquidity_usd', 'op': '<', 'value': 1000}
+        ]},
+        {'name': "Very low activity", 'all': [
+            {'column': 'activity_valid', 'op': '==', 'value': True},
+            {'column': 'txns_5m', 'op': '==', 'value': 0},
+            {'column': 'has_txns_1h', 'op': '==', 'value': True},
+            {'column': 'txns_1h', 'op': '<', 'value': 5}
+        ]}
+    ],
+    # Risk components are summed in order; their factors are listed in the same order.
+    # Ladder buckets follow np.digitize: value < thresholds[0] is bucket 0, and so on.
+    'risk': {
+        'components': [
+            {'ladder': 'market_cap', 'thresholds': [10000, 25000, 50000], 'points': [3, 2, 1, 0],
+             'factors': ["Very Low Market Cap (<$10K)", "Low Market Cap (<$25K)", "Small Market Cap (<$50K)", None]},
+            {'ladder': 'age_minutes', 'thresholds': [2, 5, 15, 30], 'points': [4, 3, 2, 1, 0],
+             'factors': ["Extremely New (<2min)", "Very New (<5min)", "New (<15min)", "Recent (<30min)", None],
+             'missing_points': 2, 'missing_factor': "Unknown Age"},
+            {'ladder': 'volume_24h', 'thresholds': [500, 2000, 5000], 'points': [3, 2, 1, 0],
+             'factors': ["Very Low Volume (<$500)", "Low Volume (<$2K)", "Moderate Volume (<$5K)", None]},
+            {'ladder': 'liquidity_usd', 'thresholds': [2000, 5000, 10000], 'points': [3, 2, 1, 0],
+             'factors': ["Very Low Liquidity (<$2K)", "Low Liquidity (<$5K)", "Moderate Liquidity (<$10K)", None]},
+            {'ladder': 'txns_5m', 'thresholds': [1, 5, 20], 'points': [3, 2, 1, 0],
+             'factors': ["No Recent Activity", "Very Low Activity (<5 txns/5m)", "Low Activity (<20 txns/5m)", None]},
+            {'category': 'dex_tier',
+             'points': {'trusted': 0, 'major': 1, 'unknown': 2},
+             'factors': {'major': "Major DEX (Non-Traditional)", 'unknown': "Unknown/Minor DEX"}},
+            {'flag': 'has_links', 'value': False, 'points': 2, 'factor': "No website or social links"},
+            {'ladder': 'abs_price_change_24h', 'thresholds': [100, 200], 'points': [0, 1, 2], 'right': True,
+             'factors': [None, "High Volatility (>100%)", "Extreme Volatility (>200%)"]}
+        ],
+        'levels': {'thresholds': [2, 5, 8, 12],
+                   'labels': ["🟢 LOW", "🟡 MEDIUM", "🟠 HIGH", "🔴 VERY HIGH", "⚫ EXTREME"]}
+    }
+}
 
 DEX_API_BASE_URL = os.getenv("DEX_API_BASE_URL", "https://api.dexscreener.com")
 TOKEN_PROFILES_LATEST_V1_ENDPOINT = os.getenv("TOKEN_PROFILES_LATEST_V1_ENDPOINT", "/token-profiles/latest/v1")
@@ -49,13 +146,257 @@ TOKEN_BOOSTS_TOP_V1_ENDPOINT = os.getenv("TOKEN_BOOSTS_TOP_V1_ENDPOINT", "/token
 DEX_SEARCH_ENDPOINT = os.getenv("DEX_SEARCH_ENDPOINT", "/latest/dex/search")
 TOKENS_V1_ENDPOINT = os.getenv("TOKENS_V1_ENDPOINT", "/tokens/v1/solana/")
 AXIOM_API_ENDPOINT = os.getenv("AXIOM_API_ENDPOINT", "https://lar.axiom.ai/api/v3")
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", 4))
+AXIOM_INGEST_URL = os.getenv("AXIOM_INGEST_URL", "https://api.axiom.co/v1/datasets/{dataset}/ingest")
+
+# Connection pool settings
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+HTTP_POOL_KEEPALIVE = int(os.getenv("HTTP_POOL_KEEPALIVE", 10))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 60))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", 8))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 15))
+
+# Rate limiter settings
+RATE_LIMIT_BURST_SECONDS = float(os.getenv("RATE_LIMIT_BURST_SECONDS", 10))
+RATE_LIMIT_DEFAULT_BACKOFF = float(os.getenv("RATE_LIMIT_DEFAULT_BACKOFF", 5))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", 2))
+
+# Axiom ingest batching
+AXIOM_BATCH_SIZE = int(os.getenv("AXIOM_BATCH_SIZE", 100))
+AXIOM_FLUSH_INTERVAL = float(os.getenv("AXIOM_FLUSH_INTERVAL", 5))
+AXIOM_SPOOL_DIR = os.getenv("AXIOM_SPOOL_DIR", "axiom_spool")
+AXIOM_SPOOL_SEGMENT_BYTES = int(os.getenv("AXIOM_SPOOL_SEGMENT_BYTES", 4 * 1024 * 1024))
+AXIOM_SPOOL_MAX_BYTES = int(os.getenv("AXIOM_SPOOL_MAX_BYTES", 256 * 1024 * 1024))
+AXIOM_SPOOL_FSYNC_INTERVAL = float(os.getenv("AXIOM_SPOOL_FSYNC_INTERVAL", 1))
+AXIOM_RETRY_MAX_DELAY = float(os.getenv("AXIOM_RETRY_MAX_DELAY", 60))
+AXIOM_INGEST_COMPRESSION = os.getenv("AXIOM_INGEST_COMPRESSION", "gzip").lower()
+
+# Log output: "text" or "json" (one compact JSON object per line)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# Fraction of high-volume per-pair events (rejections) logged at INFO; DEBUG logs them all
+LOG_EVENT_SAMPLE_RATE = float(os.getenv("LOG_EVENT_SAMPLE_RATE", 0.01))
+# Log file rotation: by size or age, whichever comes first; rotated files are gzipped
+LOG_FILE = os.getenv("LOG_FILE", "solana_bot.log")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 50 * 1024 * 1024))
+LOG_ROTATE_SECONDS = float(os.getenv("LOG_ROTATE_SECONDS", 24 * 3600))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 14))
+
+# Telegram outbox (Bot API limits: ~30 messages/s overall, 1/s per chat, 20/min per group)
+TELEGRAM_GLOBAL_RATE_PER_SECOND = float(os.getenv("TELEGRAM_GLOBAL_RATE_PER_SECOND", 30))
+TELEGRAM_CHAT_RATE_PER_MINUTE = float(os.getenv("TELEGRAM_CHAT_RATE_PER_MINUTE", 60))
+TELEGRAM_GROUP_RATE_PER_MINUTE = float(os.getenv("TELEGRAM_GROUP_RATE_PER_MINUTE", 20))
+# Alerts a subscriber may have waiting before new ones skip that chat
+TELEGRAM_CHAT_BACKLOG = int(os.getenv("TELEGRAM_CHAT_BACKLOG", 20))
+# Telegram user ids allowed to /subscribe and /unsubscribe chats (comma-separated; empty disables both)
+SUBSCRIPTION_ADMIN_IDS = frozenset(filter(None, (uid.strip() for uid in os.getenv("SUBSCRIPTION_ADMIN_IDS", "").split(","))))
+MAX_SUBSCRIPTIONS = int(os.getenv("MAX_SUBSCRIPTIONS", 25))
+
+# Local scrape endpoint (/metrics in Prometheus text format, /health as JSON); port 0 disables it
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT") or 0)
+METRICS_READ_TIMEOUT = float(os.getenv("METRICS_READ_TIMEOUT", 5))
+# /health reports "stale" (HTTP 503) once the last finished scan is older than this
+HEALTH_MAX_SCAN_AGE = float(os.getenv("HEALTH_MAX_SCAN_AGE", max(60, 5 * CHECK_INTERVAL)))
+
+# Emojis are replaced with text equivalents for problematic consoles. The table is
+# keyed by code point, so the emoji variation selector (U+FE0F) is dropped.
+LOG_EMOJI_REPLACEMENTS = {
+    '🔍': '[SEARCH]',
+    '📊': '[STATS]',
+    '💾': '[CACHE]',
+    '😴': '[SLEEP]',
+    '✅': '[SUCCESS]',
+    '❌': '[ERROR]',
+    '⚠️': '[WARNING]',
+    '🚀': '[ROCKET]',
+    '💥': '[BOOM]',
+    '🎯': '[TARGET]',
+    '📤': '[SEND]',
+    '🔄': '[REFRESH]',
+    '💎': '[DIAMOND]',
+    '🌊': '[WAVE]',
+    '🐋': '[WHALE]',
+    '🪐': '[PLANET]',
+    '🌙': '[MOON]',
+    '💰': '[MONEY]',
+    '💵': '[DOLLAR]',
+    '📈': '[UP]',
+    '📉': '[DOWN]',
+    '⬆️': '[UP_ARROW]',
+    '⬇️': '[DOWN_ARROW]',
+    '🔗': '[LINK]',
+    '🏪': '[STORE]'
+}
+LOG_ASCII_TABLE = str.maketrans({
+    **{emoji.rstrip('\ufe0f'): text for emoji, text in LOG_EMOJI_REPLACEMENTS.items()},
+    '\ufe0f': None
+})
+LOG_LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'critical': logging.CRITICAL
+}
+
+# Scan id and pipeline stage of the running task, stamped onto every log record
+SCAN_ID = contextvars.ContextVar('scan_id', default=None)
+SCAN_STAGE = contextvars.ContextVar('scan_stage', default=None)
+# Record attributes (set via extra= or the context filter) copied into JSON log lines
+LOG_FIELDS = ('event', 'scan_id', 'stage', 'pair_id', 'symbol', 'reason', 'sample_rate', 'counters')
+
+class ScanContextFilter(logging.Filter):
+    """Adds the current scan id and stage; runs in the logging task before the record is queued"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, 'scan_id', None) is None:
+            record.scan_id = SCAN_ID.get()
+        if getattr(record, 'stage', None) is None:
+            record.stage = SCAN_STAGE.get()
+        return True
+
+class JsonLogFormatter(logging.Formatter):
+    """Compact JSON lines: timestamp, level, message and any structured fields present"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage().translate(LOG_ASCII_TABLE)
+        }
+        for field in LOG_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, separators=(',', ':'), default=str)
+
+def reason_category(reason: str) -> str:
+    """Machine-friendly slug of a rejection reason, e.g. 'Low volume' -> 'low_volume'"""
+    return re.sub(r'[^a-z0-9]+', '_', reason.lower()).strip('_')
+
+class AsciiFallbackFormatter(logging.Formatter):
+    """Formatter that swaps known emojis for text tags, run on the listener thread"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        return super().format(record).translate(LOG_ASCII_TABLE)
+
+class CompressingRotatingFileHandler(BaseRotatingHandler):
+    """Rotates the log by size or age and gzips rotated files on a background thread.
+    
+    Rotation happens inside emit, which runs on the QueueListener thread, so the
+    event loop never waits on it; compression and retention run on their own thread.
+    """
+    
+    def __init__(self, filename: str, max_bytes: int = LOG_MAX_BYTES, interval: float = LOG_ROTATE_SECONDS,
+                 backup_count: int = LOG_BACKUP_COUNT, encoding: str = 'utf-8'):
+        super().__init__(filename, 'a', encoding=encoding, delay=False)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.rotated_re = re.compile(re.escape(os.path.basename(self.baseFilename)) + r'\.(\d{8}-\d{6})(?:\.(\d+))?(\.gz)?$')
+        # A plain daemon thread rather than an executor: executors stop accepting
+        # work at interpreter shutdown, before the queue listener's final flush
+        self.jobs = queue.SimpleQueue()
+        self.compressor = threading.Thread(target=self._run_jobs, name='log-gzip', daemon=True)
+        self.compressor.start()
+        try:
+            started = os.stat(self.baseFilename).st_mtime
+        except OSError:
+            started = time.time()
+        self.rollover_at = started + interval
+        # Rotations within one second get increasing suffixes, even after older ones were pruned
+        self.last_rotation = ('', -1)
+        # Finish compressing anything a previous run rotated but did not get to
+        for path in self._rotated_files():
+            if not path.endswith('.gz'):
+                self.jobs.put(path)
+        self.jobs.put('')
+    
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.stream is None:
+            self.stream = self._open()
+        if self.interval > 0 and time.time() >= self.rollover_at:
+            return True
+        return self.max_bytes > 0 and self.stream.tell() >= self.max_bytes
+    
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        suffix = self.last_rotation[1] + 1 if stamp == self.last_rotation[0] else 0
+        while True:
+            target = f"{self.baseFilename}.{stamp}.{suffix}" if suffix else f"{self.baseFilename}.{stamp}"
+            if not (os.path.exists(target) or os.path.exists(target + '.gz')):
+                break
+            suffix += 1
+        self.last_rotation = (stamp, suffix)
+        if os.path.exists(self.baseFilename):
+            os.replace(self.baseFilename, target)
+            self.jobs.put(target)
+        
+        self.stream = self._open()
+        self.rollover_at = time.time() + self.interval
+    
+    def _rotated_files(self) -> List[str]:
+        """Rotated files oldest first, ordered by the timestamp and suffix in their names"""
+        directory = os.path.dirname(self.baseFilename)
+        rotated = []
+        for name in os.listdir(directory):
+            match = self.rotated_re.match(name)
+            if match:
+                rotated.append(((match.group(1), int(match.group(2) or 0)), os.path.join(directory, name)))
+        return [path for _, path in sorted(rotated)]
+    
+    def _run_jobs(self):
+        """Compress rotated files handed over by doRollover; '' only prunes, None stops"""
+        while True:
+            path = self.jobs.get()
+            if path is None:
+                return
+            if path:
+                self._compress(path)
+            self._enforce_retention()
+    
+    def _compress(self, path: str):
+        try:
+            with open(path, 'rb') as src, gzip.open(path + '.gz.tmp', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            shutil.copystat(path, path + '.gz.tmp')
+            os.replace(path + '.gz.tmp', path + '.gz')
+            os.remove(path)
+        except OSError as e:
+            # The uncompressed file is kept and retried on the next start
+            print(f"Failed to compress rotated log {path}: {e}", file=sys.stderr)
+    
+    def _enforce_retention(self):
+        try:
+            rotated = self._rotated_files()
+            for path in rotated[:max(0, len(rotated) - self.backup_count)]:
+                # Files still waiting for compression are pruned once their job has run
+                if path.endswith('.gz'):
+                    os.remove(path)
+        except OSError as e:
+            print(f"Failed to prune rotated logs: {e}", file=sys.stderr)
+    
+    def close(self):
+        super().close()
+        if self.compressor.is_alive():
+            self.jobs.put(None)
+            self.compressor.join()
 
 # Setup logging with proper encoding
 def setup_logging():
     """Setup logging with UTF-8 encoding support"""
     try:
-        # Create file handler with UTF-8 encoding
-        file_handler = logging.FileHandler('solana_bot.log', encoding='utf-8')
+        # Create rotating file handler with UTF-8 encoding
+        file_handler = CompressingRotatingFileHandler(LOG_FILE)
         file_handler.setLevel(logging.INFO)
         
         # Create console handler with UTF-8 encoding
@@ -63,15 +404,29 @@ def setup_logging():
         console_handler.setLevel(logging.INFO)
         
         # Create formatter
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        if LOG_FORMAT == 'json':
+            formatter = JsonLogFormatter()
+        else:
+            formatter = AsciiFallbackFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
         
+        # Callers only enqueue records; formatting and file/console writes
+        # happen on the listener thread, off the event loop
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        
         # Get root logger
         logger = logging.getLogger()
         logger.setLevel(logging.INFO)
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.addFilter(ScanContextFilter())
+        logger.addHandler(queue_handler)
+        
+        # httpx logs every request at INFO; keep the pool quiet
+        logging.getLogger('httpx').setLevel(logging.WARNING)
         
         return logging.getLogger(__name__)
         
@@ -81,7 +436,7 @@ def setup_logging():
             level=logging.INFO,
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             handlers=[
-                logging.FileHandler('solana_bot.log'),
+                logging.FileHandler(LOG_FILE),
                 logging.StreamHandler()
             ]
         )
@@ -89,12 +444,1575 @@ def setup_logging():
 
 logger = setup_logging()
 
+class LatencyHistogram:
+    """HDR-style latency histogram: log-linear buckets with ~3% relative error from 1us to hours"""
+    
+    SUB_BUCKETS = 32  # linear sub-buckets per power of two
+    MAX_EXPONENT = 40  # 2**40 us is about 12 days
+    
+    def __init__(self):
+        self.counts = np.zeros((self.MAX_EXPONENT + 1) * self.SUB_BUCKETS, dtype=np.int64)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+    
+    def _index(self, micros: float) -> int:
+        if micros < 1:
+            return 0
+        mantissa, exponent = math.frexp(micros)  # micros = mantissa * 2**exponent, mantissa in [0.5, 1)
+        if exponent > self.MAX_EXPONENT:
+            return len(self.counts) - 1
+        return exponent * self.SUB_BUCKETS + int((mantissa - 0.5) * 2 * self.SUB_BUCKETS)
+    
+    @classmethod
+    def _upper_bounds(cls, indexes: np.ndarray) -> np.ndarray:
+        exponent, sub = np.divmod(indexes, cls.SUB_BUCKETS)
+        return np.ldexp(0.5 + (sub + 1) / (2 * cls.SUB_BUCKETS), exponent) / 1e6
+    
+    def observe(self, seconds: float):
+        seconds = max(0.0, seconds)
+        self.counts[self._index(seconds * 1e6)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+    
+    def quantiles(self, qs) -> List[float]:
+        """Upper bound of the bucket holding each q-th observation, in seconds"""
+        if not self.count:
+            return [0.0] * len(qs)
+        ranks = np.maximum(1, np.ceil(np.asarray(qs) * self.count))
+        indexes = np.searchsorted(np.cumsum(self.counts), ranks)
+        return np.minimum(self._upper_bounds(indexes), self.max).tolist()
+    
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+class MetricTimer:
+    """Context manager that records its elapsed time into a histogram, labelled with an outcome"""
+    
+    def __init__(self, registry: 'MetricsRegistry', name: str, labels: Dict[str, str]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.outcome: Optional[str] = None
+    
+    def __enter__(self) -> 'MetricTimer':
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        outcome = self.outcome or ('error' if exc_type else 'ok')
+        self.registry.observe(self.name, time.perf_counter() - self.started, outcome=outcome, **self.labels)
+        return False
+
+class MetricsRegistry:
+    """In-process counters, gauges and latency histograms, keyed by metric name and labels"""
+    
+    QUANTILES = (0.5, 0.95, 0.99)
+    
+    def __init__(self):
+        self.kinds: Dict[str, str] = {}
+        self.series: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], object] = {}
+    
+    def _key(self, kind: str, name: str, labels: Dict) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+        if self.kinds.setdefault(name, kind) != kind:
+            raise ValueError(f"metric {name} is a {self.kinds[name]}, not a {kind}")
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+    
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = self._key('counter', name, labels)
+        self.series[key] = self.series.get(key, 0) + amount
+    
+    def set_gauge(self, name: str, value: float, **labels):
+        self.series[self._key('gauge', name, labels)] = value
+    
+    def register_callback(self, kind: str, name: str, read, **labels):
+        """Counter or gauge whose value is read from read() when metrics are collected"""
+        self.series[self._key(kind, name, labels)] = read
+    
+    def observe(self, name: str, seconds: float, **labels):
+        key = self._key('histogram', name, labels)
+        histogram = self.series.get(key)
+        if histogram is None:
+            histogram = self.series[key] = LatencyHistogram()
+        histogram.observe(seconds)
+    
+    def timer(self, name: str, **labels) -> MetricTimer:
+        return MetricTimer(self, name, labels)
+    
+    def collect(self) -> List[Tuple[str, str, Dict[str, str], object]]:
+        """(kind, name, labels, value or histogram) for every series, sorted by name"""
+        collected = []
+        for (name, labels), value in sorted(self.series.items(), key=lambda item: item[0]):
+            if callable(value):
+                try:
+                    value = value()
+                except Exception:
+                    continue
+            collected.append((self.kinds[name], name, dict(labels), value))
+        return collected
+    
+    def latency_summary(self) -> List[Tuple[str, Dict[str, str], int, List[float]]]:
+        """(name, labels, count, [p50, p95, p99]) for every histogram series"""
+        return [
+            (name, labels, value.count, value.quantiles(self.QUANTILES))
+            for kind, name, labels, value in self.collect() if kind == 'histogram'
+        ]
+    
+    @staticmethod
+    def _prometheus_labels(labels: Dict[str, str], **extra) -> str:
+        labels = {**labels, **extra}
+        if not labels:
+            return ''
+        escaped = (
+            f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), chr(92) + "n")}"'
+            for key, value in labels.items()
+        )
+        return '{' + ','.join(escaped) + '}'
+    
+    def render_prometheus(self, prefix: str = 'solana_bot_') -> str:
+        """Prometheus text exposition; latency histograms are exported as summaries"""
+        lines = []
+        typed = set()
+        for kind, name, labels, value in self.collect():
+            metric = prefix + name
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} {'summary' if kind == 'histogram' else kind}")
+            if kind == 'histogram':
+                for q, v in zip(self.QUANTILES, value.quantiles(self.QUANTILES)):
+                    lines.append(f"{metric}{self._prometheus_labels(labels, quantile=q)} {v:.6g}")
+                lines.append(f"{metric}_sum{self._prometheus_labels(labels)} {value.sum:.6g}")
+                lines.append(f"{metric}_count{self._prometheus_labels(labels)} {value.count}")
+            else:
+                lines.append(f"{metric}{self._prometheus_labels(labels)} {float(value):.10g}")
+        return '\n'.join(lines) + '\n'
+
+class TokenBucket:
+    """Async token bucket whose rate is learned from server rate-limit headers"""
+    
+    def __init__(self, limit_per_minute: float, burst_seconds: float = RATE_LIMIT_BURST_SECONDS):
+        self.refill_rate = limit_per_minute / 60.0
+        self.burst_seconds = burst_seconds
+        self.capacity = max(1.0, self.refill_rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+    
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+    
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.refill_rate
+                await asyncio.sleep(wait)
+    
+    def block_for(self, seconds: float):
+        """Stop handing out tokens for the given number of seconds"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, now + seconds)
+    
+    @staticmethod
+    def _header_float(headers, name: str) -> Optional[float]:
+        value = headers.get(name)
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header given as seconds or as an HTTP date"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+    
+    def update_from_headers(self, headers, status_code: int):
+        """Adjust rate and budget from X-RateLimit-* and Retry-After headers"""
+        limit = self._header_float(headers, 'x-ratelimit-limit')
+        if limit and limit > 0:
+            # X-RateLimit-Limit is the number of requests permitted per minute
+            self.refill_rate = limit / 60.0
+            self.capacity = max(1.0, self.refill_rate * self.burst_seconds)
+        
+        remaining = self._header_float(headers, 'x-ratelimit-remaining')
+        if remaining is not None:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, remaining)
+            if remaining <= 0:
+                # X-RateLimit-Reset is the window reset time in UTC epoch seconds
+                reset = self._header_float(headers, 'x-ratelimit-reset')
+                if reset:
+                    self.block_for(max(0.0, reset - time.time()))
+        
+        retry_after = self.parse_retry_after(headers.get('retry-after'))
+        if retry_after is not None:
+            self.block_for(retry_after)
+        elif status_code == 429 and self.blocked_until <= time.monotonic():
+            self.block_for(RATE_LIMIT_DEFAULT_BACKOFF)
+
+class PooledHttpClient:
+    """Long-lived keep-alive connection pool shared by all outbound API calls"""
+    
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, keepalive: int = HTTP_POOL_KEEPALIVE,
+                 keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY, per_host_limit: int = HTTP_PER_HOST_LIMIT,
+                 timeout: float = HTTP_TIMEOUT):
+        self.limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.host_semaphores = defaultdict(lambda: asyncio.Semaphore(self.per_host_limit))
+        self.client: Optional[httpx.AsyncClient] = None
+        self.metrics = {
+            'requests': 0,
+            'new_connections': 0,
+            'tls_handshakes': 0,
+            'errors': 0
+        }
+        self.host_metrics = defaultdict(lambda: {'requests': 0, 'new_connections': 0})
+    
+    def get_client(self) -> httpx.AsyncClient:
+        """Return the underlying client, creating it on first use"""
+        if self.client is None or self.client.is_closed:
+            self.client = httpx.AsyncClient(
+                headers={
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                    'Accept': 'application/json',
+                    'Accept-Language': 'en-US,en;q=0.9',
+                    'Connection': 'keep-alive',
+                    'Sec-Fetch-Dest': 'empty',
+                    'Sec-Fetch-Mode': 'cors',
+                    'Sec-Fetch-Site': 'cross-site'
+                },
+                limits=self.limits,
+                timeout=self.timeout
+            )
+        return self.client
+    
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the pool, honouring the per-host limit"""
+        host = httpx.URL(url).host
+        host_stats = self.host_metrics[host]
+        
+        async def trace(event_name: str, info: Dict):
+            # A TCP connect means the pool had no idle connection to reuse
+            if event_name == 'connection.connect_tcp.complete':
+                self.metrics['new_connections'] += 1
+                host_stats['new_connections'] += 1
+            elif event_name == 'connection.start_tls.complete':
+                self.metrics['tls_handshakes'] += 1
+        
+        async with self.host_semaphores[host]:
+            self.metrics['requests'] += 1
+            host_stats['requests'] += 1
+            try:
+                return await self.get_client().request(method, url, extensions={'trace': trace}, **kwargs)
+            except httpx.HTTPError:
+                self.metrics['errors'] += 1
+                raise
+    
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, **kwargs)
+    
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('POST', url, **kwargs)
+    
+    def reuse_ratio(self) -> float:
+        """Fraction of requests served on an already-open connection"""
+        if not self.metrics['requests']:
+            return 0.0
+        reused = self.metrics['requests'] - self.metrics['new_connections']
+        return max(reused, 0) / self.metrics['requests']
+    
+    def get_stats(self) -> Dict:
+        """Snapshot of pool and connection reuse metrics"""
+        return {
+            **self.metrics,
+            'reuse_ratio': round(self.reuse_ratio(), 3),
+            'hosts': {host: dict(stats) for host, stats in self.host_metrics.items()}
+        }
+    
+    async def close(self):
+        """Close all pooled connections"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+class NDJSONEncoder:
+    """Streams events as compressed NDJSON into a reusable buffer"""
+    
+    def __init__(self, compression: str = AXIOM_INGEST_COMPRESSION, static_fields: Optional[Dict] = None):
+        if compression == 'zstd' and zstandard is None:
+            logging.getLogger(__name__).warning("zstandard is not installed, falling back to gzip for Axiom ingest")
+            compression = 'gzip'
+        if compression not in ('gzip', 'zstd'):
+            compression = 'none'
+        self.compression = compression
+        self.buffer = io.BytesIO()
+        self.json_encoder = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False, default=str)
+        self.zstd_compressor = zstandard.ZstdCompressor(level=3) if compression == 'zstd' else None
+        
+        # Fields shared by every event are serialized once and spliced into each line
+        self.static_suffix = b''
+        if static_fields:
+            self.static_suffix = self.json_encoder.encode(static_fields)[1:-1].encode('utf-8')
+    
+    @property
+    def headers(self) -> Dict[str, str]:
+        headers = {'Content-Type': 'application/x-ndjson'}
+        if self.compression != 'none':
+            headers['Content-Encoding'] = self.compression
+        return headers
+    
+    def _compressor(self):
+        if self.compression == 'gzip':
+            return zlib.compressobj(6, zlib.DEFLATED, 31)
+        if self.compression == 'zstd':
+            return self.zstd_compressor.compressobj()
+        return None
+    
+    def encode_line(self, event: Dict) -> bytes:
+        """Encode a single event as one NDJSON line"""
+        line = self.json_encoder.encode(event).encode('utf-8')
+        if self.static_suffix:
+            line = line[:-1] + (b',' if len(line) > 2 else b'') + self.static_suffix + b'}'
+        return line + b'\n'
+    
+    def compress(self, lines) -> bytes:
+        """Stream already-encoded NDJSON lines into one request body"""
+        buffer = self.buffer
+        buffer.seek(0)
+        buffer.truncate()
+        compressor = self._compressor()
+        
+        for line in lines:
+            buffer.write(compressor.compress(line) if compressor else line)
+        
+        if compressor:
+            buffer.write(compressor.flush())
+        return buffer.getvalue()
+    
+    def encode(self, events) -> bytes:
+        """Encode an iterable of events into one request body"""
+        return self.compress(self.encode_line(event) for event in events)
+
+class AxiomSpool:
+    """Append-only, segment-rotated on-disk spool of NDJSON lines awaiting ingest"""
+    
+    def __init__(self, directory: str = AXIOM_SPOOL_DIR, segment_bytes: int = AXIOM_SPOOL_SEGMENT_BYTES,
+                 max_bytes: int = AXIOM_SPOOL_MAX_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.offset_path = os.path.join(directory, 'offset.json')
+        self.lock = threading.Lock()
+        self.dropped_segments = 0
+        
+        os.makedirs(directory, exist_ok=True)
+        self.segments = sorted(
+            int(name.split('.')[0]) for name in os.listdir(directory)
+            if name.endswith('.ndjson') and name.split('.')[0].isdigit()
+        ) or [1]
+        self.read_segment, self.read_offset = self._load_offset()
+        
+        # A crash can leave a half-written line at the end of the newest segment
+        self.active_segment = self.segments[-1]
+        self._repair_tail(self.active_segment)
+        self.writer = open(self._segment_path(self.active_segment), 'ab')
+        self.active_size = self.writer.tell()
+        self.dirty = False
+        # Rotated-out writers, fsynced and closed by the next sync() instead of on the event loop
+        self.unsynced = []
+    
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{seq:012d}.ndjson")
+    
+    def _load_offset(self) -> Tuple[int, int]:
+        try:
+            with open(self.offset_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            seq, offset = int(data['segment']), int(data['offset'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return self.segments[0], 0
+        if seq < self.segments[0]:
+            return self.segments[0], 0
+        return seq, offset
+    
+    def _repair_tail(self, seq: int):
+        path = self._segment_path(seq)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        if size == 0:
+            return
+        with open(path, 'rb+') as f:
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            end = size
+            while end > 0:
+                start = max(0, end - 65536)
+                f.seek(start)
+                idx = f.read(end - start).rfind(b'\n')
+                if idx != -1:
+                    f.truncate(start + idx + 1)
+                    return
+                end = start
+            f.truncate(0)
+    
+    def _rotate(self):
+        self.writer.flush()
+        self.unsynced.append(self.writer)
+        self.active_segment += 1
+        self.segments.append(self.active_segment)
+        self.writer = open(self._segment_path(self.active_segment), 'ab')
+        self.active_size = 0
+    
+    def append(self, line: bytes):
+        """Append one NDJSON line; durability comes with the next sync()"""
+        with self.lock:
+            if self.active_size and self.active_size + len(line) > self.segment_bytes:
+                self._rotate()
+            self.writer.write(line)
+            self.active_size += len(line)
+            self.dirty = True
+    
+    def sync(self):
+        """Flush buffered appends and fsync them (batched, call from a worker thread)"""
+        with self.lock:
+            rotated, self.unsynced = self.unsynced, []
+            if not self.dirty and not rotated:
+                return
+            self.writer.flush()
+            fd = self.writer.fileno()
+            self.dirty = False
+        for writer in rotated:
+            try:
+                os.fsync(writer.fileno())
+            except OSError:
+                pass
+            writer.close()
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass  # spool was closed meanwhile
+    
+    def has_pending(self) -> bool:
+        with self.lock:
+            return (self.read_segment, self.read_offset) < (self.active_segment, self.active_size)
+    
+    def read_batch(self, max_lines: int) -> Tuple[List[bytes], Tuple[int, int]]:
+        """Read up to max_lines complete lines from the committed offset"""
+        with self.lock:
+            self.writer.flush()
+            segments = list(self.segments)
+            active_segment = self.active_segment
+        
+        seq, offset = self.read_segment, self.read_offset
+        lines = []
+        while len(lines) < max_lines:
+            try:
+                with open(self._segment_path(seq), 'rb') as f:
+                    f.seek(offset)
+                    for raw in f:
+                        if not raw.endswith(b'\n'):
+                            break
+                        lines.append(raw)
+                        offset += len(raw)
+                        if len(lines) >= max_lines:
+                            break
+            except FileNotFoundError:
+                pass
+            if len(lines) >= max_lines or seq >= active_segment:
+                break
+            later = [n for n in segments if n > seq]
+            if not later:
+                break
+            seq, offset = later[0], 0
+        
+        return lines, (seq, offset)
+    
+    def commit(self, position: Tuple[int, int]):
+        """Persist the replay offset and delete fully drained segments"""
+        self.read_segment, self.read_offset = position
+        tmp_path = self.offset_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'segment': position[0], 'offset': position[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.offset_path)
+        
+        with self.lock:
+            drained = [n for n in self.segments if n < position[0]]
+            self.segments = [n for n in self.segments if n >= position[0]]
+        for seq in drained:
+            try:
+                os.remove(self._segment_path(seq))
+            except FileNotFoundError:
+                pass
+    
+    def _count_lines(self, seq: int, offset: int) -> int:
+        try:
+            with open(self._segment_path(seq), 'rb') as f:
+                f.seek(offset)
+                return sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(65536), b''))
+        except OSError:
+            return 0
+    
+    def enforce_limit(self) -> int:
+        """Drop the oldest segments while the spool is over max_bytes; returns how many unsent lines were lost"""
+        dropped_lines = 0
+        while True:
+            with self.lock:
+                if len(self.segments) < 2:
+                    return dropped_lines
+                oldest = self.segments[0]
+                sizes = []
+                for n in self.segments:
+                    try:
+                        sizes.append(os.path.getsize(self._segment_path(n)))
+                    except OSError:
+                        sizes.append(0)
+            if sum(sizes) <= self.max_bytes:
+                return dropped_lines
+            self.dropped_segments += 1
+            if self.read_segment <= oldest:
+                dropped_lines += self._count_lines(oldest, self.read_offset if self.read_segment == oldest else 0)
+            self.commit((oldest + 1, 0) if self.read_segment <= oldest else (self.read_segment, self.read_offset))
+    
+    def close(self):
+        self.sync()
+        with self.lock:
+            self.writer.close()
+
+class AxiomIngestBuffer:
+    """Background drainer that replays the on-disk spool to Axiom in batches"""
+    
+    def __init__(self, send_batch, spool: AxiomSpool, batch_size: int = AXIOM_BATCH_SIZE,
+                 flush_interval: float = AXIOM_FLUSH_INTERVAL):
+        self.send_batch = send_batch
+        self.spool = spool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = 0
+        self.oldest_event_time = 0.0
+        self.replay_pending = spool.has_pending()
+        self.retry_delay = 0.0
+        self.retry_at = 0.0
+        self.flush_requested = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+    
+    def add(self, line: bytes):
+        """Spool an encoded event without waiting on the network"""
+        self.spool.append(line)
+        if not self.pending:
+            self.oldest_event_time = time.monotonic()
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush_requested.set()
+    
+    def start(self):
+        """Start the background drain loop"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+    
+    async def _run(self):
+        while True:
+            timeout = AXIOM_SPOOL_FSYNC_INTERVAL
+            if self.pending:
+                timeout = min(timeout, max(0.0, self.oldest_event_time + self.flush_interval - time.monotonic()))
+            try:
+                await asyncio.wait_for(self.flush_requested.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.flush_requested.clear()
+            
+            await asyncio.to_thread(self.spool.sync)
+            # Bound the spool on every tick, including while sends keep failing
+            await self.enforce_limit()
+            
+            now = time.monotonic()
+            if now < self.retry_at:
+                continue
+            aged = self.pending and now - self.oldest_event_time >= self.flush_interval
+            if self.replay_pending or aged:
+                await self.flush()
+            elif self.pending >= self.batch_size:
+                # Size trigger: only ship full batches, the rest waits for its age
+                await self.flush(full_batches_only=True)
+    
+    async def flush(self, full_batches_only: bool = False) -> bool:
+        """Replay spooled events in batches of at most batch_size"""
+        while True:
+            lines, position = await asyncio.to_thread(self.spool.read_batch, self.batch_size)
+            if not lines or (full_batches_only and len(lines) < self.batch_size):
+                break
+            
+            if not await self.send_batch(lines):
+                # Keep the offset; the same batch is replayed after a backoff
+                self.retry_delay = min(max(self.retry_delay * 2, 1.0), AXIOM_RETRY_MAX_DELAY)
+                self.retry_at = time.monotonic() + self.retry_delay
+                return False
+            
+            await asyncio.to_thread(self.spool.commit, position)
+            self.retry_delay = 0.0
+            self.pending = max(0, self.pending - len(lines))
+            self.oldest_event_time = time.monotonic()
+        
+        if not full_batches_only:
+            self.pending = 0
+            self.replay_pending = False
+        return True
+    
+    async def enforce_limit(self):
+        dropped = await asyncio.to_thread(self.spool.enforce_limit)
+        if dropped:
+            self.pending = max(0, self.pending - dropped)
+            logger.warning(f"Axiom spool over {self.spool.max_bytes} bytes, dropped {dropped} unsent events")
+    
+    async def stop(self, timeout: float = 10):
+        """Stop the drain loop, try a last flush and close the spool"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            pass  # anything unsent stays in the spool for the next start
+        self.spool.close()
+
+class TelegramOutbox:
+    """Priority outbox that sends Telegram messages as fast as the per-chat and global limits allow"""
+    
+    SYSTEM_PRIORITY = -1
+    
+    def __init__(self, send_message):
+        self.send_message = send_message
+        self.global_bucket = TokenBucket(TELEGRAM_GLOBAL_RATE_PER_SECOND * 60, burst_seconds=1)
+        self.chat_buckets: Dict[str, TokenBucket] = {}
+        # One lane (priority queue + worker) per chat, so a throttled chat never stalls the others
+        self.lanes: Dict[str, asyncio.PriorityQueue] = {}
+        self.workers: Dict[str, asyncio.Task] = {}
+        self.seq = 0
+        self.stats = {'sent': 0, 'failed': 0, 'retry_after': 0}
+    
+    @property
+    def pending(self) -> int:
+        return sum(lane.qsize() for lane in self.lanes.values())
+    
+    def backlog(self, chat_id) -> int:
+        lane = self.lanes.get(str(chat_id))
+        return lane.qsize() if lane is not None else 0
+    
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            # Group and channel ids are negative
+            limit = TELEGRAM_GROUP_RATE_PER_MINUTE if chat_id.startswith('-') else TELEGRAM_CHAT_RATE_PER_MINUTE
+            bucket = self.chat_buckets[chat_id] = TokenBucket(limit, burst_seconds=0)
+        return bucket
+    
+    def submit(self, chat_id, text: str, priority: int = 0) -> asyncio.Future:
+        """Queue a message; the future resolves to True once every part was delivered"""
+        chat_id = str(chat_id)
+        # Split message if too long (Telegram limit is ~4096 characters)
+        parts = [text[i:i+4000] for i in range(0, len(text), 4000)] or ['']
+        future = asyncio.get_running_loop().create_future()
+        
+        lane = self.lanes.get(chat_id)
+        if lane is None:
+            lane = self.lanes[chat_id] = asyncio.PriorityQueue()
+            self.workers[chat_id] = asyncio.create_task(self._run(chat_id, lane))
+        self.seq += 1
+        lane.put_nowait((priority, self.seq, parts, future))
+        return future
+    
+    async def _run(self, chat_id: str, lane: asyncio.PriorityQueue):
+        bucket = self._chat_bucket(chat_id)
+        while True:
+            priority, seq, parts, future = await lane.get()
+            try:
+                delivered = await self._deliver(chat_id, bucket, parts)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.set_result(False)
+                raise
+            finally:
+                lane.task_done()
+            if not future.done():
+                future.set_result(delivered)
+    
+    async def _deliver(self, chat_id: str, bucket: TokenBucket, parts: List[str]) -> bool:
+        retries = 0
+        sent = 0
+        while sent < len(parts):
+            await bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                await self.send_message(
+                    chat_id=chat_id,
+                    text=parts[sent],
+                    parse_mode='Markdown',
+                    disable_web_page_preview=True
+                )
+                sent += 1
+            except RetryAfter as e:
+                # Flood control: wait exactly as long as Telegram asks, then resend this part
+                self.stats['retry_after'] += 1
+                retry_after = e.retry_after
+                seconds = retry_after.total_seconds() if isinstance(retry_after, timedelta) else float(retry_after)
+                bucket.block_for(seconds)
+                retries += 1
+                if retries > RATE_LIMIT_MAX_RETRIES:
+                    logger.error(f"Telegram flood control persisted for chat {chat_id}, dropping message")
+                    self.stats['failed'] += 1
+                    return False
+                logger.warning(f"Telegram flood control for chat {chat_id}, retrying in {seconds:.1f}s")
+            except Exception as e:
+                logger.error(f"Error sending Telegram message: {e}")
+                self.stats['failed'] += 1
+                
+                # Try sending a simplified version
+                try:
+                    await bucket.acquire()
+                    await self.send_message(chat_id=chat_id, text="⚠️ Error sending full message. Check logs for details.")
+                except Exception:
+                    pass
+                return False
+        
+        self.stats['sent'] += 1
+        return True
+    
+    async def stop(self, timeout: float = 10):
+        """Give queued messages a chance to go out, then stop all lanes"""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(lane.join() for lane in self.lanes.values())), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self.pending} unsent Telegram messages on shutdown")
+        for worker in self.workers.values():
+            worker.cancel()
+        for lane in self.lanes.values():
+            while not lane.empty():
+                _, _, _, future = lane.get_nowait()
+                if not future.done():
+                    future.set_result(False)
+        await asyncio.gather(*self.workers.values(), return_exceptions=True)
+        self.workers.clear()
+        self.lanes.clear()
+
+class MetricsServer:
+    """Minimal HTTP/1.1 listener on the bot's event loop for local scrapers"""
+    
+    STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 503: 'Service Unavailable'}
+    
+    def __init__(self, routes: Dict, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        # path -> callable returning (status, content_type, body); handlers must be cheap and non-blocking
+        self.routes = routes
+        self.host = host
+        self.port = port
+        self.server = None
+        self.clients = set()
+    
+    async def start(self):
+        if not self.port:
+            return
+        try:
+            self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        except OSError as e:
+            logger.error(f"Metrics endpoint disabled, cannot listen on {self.host}:{self.port}: {e}")
+            return
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self.clients.add(task)
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), METRICS_READ_TIMEOUT)
+                method, target, _ = head.split(b'\r\n', 1)[0].decode('latin-1').split(' ', 2)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                status, content_type, body = 400, 'text/plain; charset=utf-8', 'bad request\n'
+                method = 'GET'
+            else:
+                route = self.routes.get(target.split('?', 1)[0])
+                if route is None:
+                    status, content_type, body = 404, 'text/plain; charset=utf-8', 'not found\n'
+                elif method not in ('GET', 'HEAD'):
+                    status, content_type, body = 405, 'text/plain; charset=utf-8', 'method not allowed\n'
+                else:
+                    status, content_type, body = route()
+            
+            payload = body.encode('utf-8')
+            writer.write(
+                f"HTTP/1.1 {status} {self.STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Cache-Control: no-store\r\n"
+                "Connection: close\r\n\r\n".encode('latin-1')
+            )
+            if method != 'HEAD':
+                writer.write(payload)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # Cancelled by stop(); end quietly, the stream callback reports cancelled handlers as errors
+            pass
+        except Exception as e:
+            logger.error(f"Metrics endpoint error: {e}")
+        finally:
+            self.clients.discard(task)
+            writer.close()
+    
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            # Drop scrapers still mid-request instead of waiting out their read timeout
+            for task in list(self.clients):
+                task.cancel()
+            await asyncio.gather(*self.clients, return_exceptions=True)
+            await self.server.wait_closed()
+            self.server = None
+
+def to_float(value, default: float = 0.0) -> float:
+    """float() that maps missing or malformed values to a default"""
+    if not value:
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+# Solana address validation, compiled once at import
+KNOWN_SOLANA_ADDRESSES = frozenset({
+    'So11111111111111111111111111111111111111112',  # WSOL
+    'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v',  # USDC
+    'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB',  # USDT
+    '11111111111111111111111111111111',  # System Program
+})
+BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+BASE58_VALUES = {c: i for i, c in enumerate(BASE58_ALPHABET)}
+# A 32-byte public key is 32 to 44 base58 characters
+BASE58_PUBKEY_RE = re.compile(r'[1-9A-HJ-NP-Za-km-z]{32,44}')
+ADDRESS_MEMO_SIZE = 65536
+
+def base58_decoded_length(address: str) -> int:
+    """Byte length of a base58 string (assumes the alphabet was already checked)"""
+    value = 0
+    for c in address:
+        value = value * 58 + BASE58_VALUES[c]
+    leading_zeros = len(address) - len(address.lstrip('1'))
+    return leading_zeros + (value.bit_length() + 7) // 8
+
+@lru_cache(maxsize=ADDRESS_MEMO_SIZE)
+def is_solana_pubkey(address: str) -> bool:
+    """True when the address is base58 that decodes to a 32-byte ed25519 public key"""
+    if address in KNOWN_SOLANA_ADDRESSES:
+        return True
+    if not BASE58_PUBKEY_RE.fullmatch(address):
+        return False
+    return base58_decoded_length(address) == 32
+
+MS_PER_MINUTE = 60_000
+# pairCreatedAt values outside this range are not valid timestamps
+PAIR_CREATED_AT_RANGE_MS = (
+    int(datetime(1, 1, 2, tzinfo=timezone.utc).timestamp() * 1000),
+    int(datetime(9999, 12, 30, tzinfo=timezone.utc).timestamp() * 1000)
+)
+
+def now_ms() -> int:
+    """Current UTC time as integer epoch milliseconds"""
+    return time.time_ns() // 1_000_000
+
+def created_at_ms(pair: Dict) -> int:
+    """pairCreatedAt as integer epoch milliseconds, 0 when missing or malformed"""
+    value = pair.get('pairCreatedAt') if isinstance(pair, dict) else None
+    if not value or isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return 0
+    low, high = PAIR_CREATED_AT_RANGE_MS
+    return int(value) if low <= value <= high else 0
+
+def pair_ages_minutes(pairs: List[Dict], scan_ms: int) -> np.ndarray:
+    """Token ages in minutes against one clock reading, NaN where unknown"""
+    created = np.fromiter((created_at_ms(pair) for pair in pairs), dtype=np.int64, count=len(pairs))
+    return np.where(created != 0, (scan_ms - created) / MS_PER_MINUTE, np.nan)
+
+class PairSnapshot:
+    """Compact, typed view of a raw DexScreener pair, parsed once per scan"""
+    
+    __slots__ = (
+        'raw', 'pair_id', 'pair_address', 'base_address', 'symbol', 'name', 'quote_token',
+        'dex_id', 'url', 'market_cap', 'price_usd', 'price_native',
+        'volume_5m', 'volume_1h', 'volume_24h',
+        'liquidity_usd', 'liquidity_base', 'liquidity_quote', 'liquidity_valid',
+        'price_change_5m', 'price_change_1h', 'price_change_24h',
+        'txns', 'txns_5m', 'txns_1h', 'has_txns_1h', 'activity_valid',
+        'age_minutes', 'websites', 'socials', 'active_boosts', 'risk_score', 'chat_ids'
+    )
+    
+    def __init__(self, pair: Dict, age_minutes: Optional[float]):
+        self.raw = pair
+        base_token = pair.get('baseToken') or {}
+        self.pair_address = pair.get('pairAddress') or ''
+        self.base_address = base_token.get('address') or ''
+        self.pair_id = f"{pair.get('pairAddress', '')}-{base_token.get('address', '')}"
+        self.symbol = base_token.get('symbol')
+        self.name = base_token.get('name')
+        self.quote_token = pair.get('quoteToken') or {}
+        self.dex_id = pair.get('dexId') or ''
+        self.url = pair.get('url', '')
+        
+        # Market data
+        self.market_cap = to_float(pair.get('fdv') or pair.get('marketCap'))
+        self.price_usd = to_float(pair.get('priceUsd'))
+        self.price_native = pair.get('priceNative', 'N/A')
+        
+        volume = pair.get('volume') or {}
+        self.volume_5m = to_float(volume.get('m5'))
+        self.volume_1h = to_float(volume.get('h1'))
+        self.volume_24h = to_float(volume.get('h24'))
+        
+        # A malformed liquidity value skips the liquidity filter, a missing one counts as zero
+        liquidity = pair.get('liquidity', {})
+        if not isinstance(liquidity, dict):
+            liquidity = {}
+            self.liquidity_valid = False
+        else:
+            usd = liquidity.get('usd')
+            self.liquidity_valid = not usd or to_float(usd, None) is not None
+        self.liquidity_usd = to_float(liquidity.get('usd'))
+        self.liquidity_base = to_float(liquidity.get('base'))
+        self.liquidity_quote = to_float(liquidity.get('quote'))
+        
+        price_change = pair.get('priceChange') or {}
+        self.price_change_5m = to_float(price_change.get('m5'))
+        self.price_change_1h = to_float(price_change.get('h1'))
+        self.price_change_24h = to_float(price_change.get('h24'))
+        
+        # Transaction activity
+        self.txns = pair.get('txns') or {}
+        self.txns_5m = 0
+        self.txns_1h = 0
+        self.has_txns_1h = False
+        try:
+            if 'm5' in self.txns:
+                self.txns_5m = (self.txns['m5'].get('buys', 0) or 0) + (self.txns['m5'].get('sells', 0) or 0)
+            if 'h1' in self.txns:
+                self.has_txns_1h = True
+                self.txns_1h = (self.txns['h1'].get('buys', 0) or 0) + (self.txns['h1'].get('sells', 0) or 0)
+            self.activity_valid = True
+        except (AttributeError, TypeError):
+            self.activity_valid = False
+        
+        self.age_minutes = age_minutes
+        
+        info = pair.get('info') or {}
+        self.websites = info.get('websites') or []
+        self.socials = info.get('socials') or []
+        self.active_boosts = (pair.get('boosts') or {}).get('active', 0) or 0
+        self.risk_score: Optional[int] = None
+        self.chat_ids: List[str] = []
+
+DEX_TIERS = ('trusted', 'major', 'unknown')
+
+# Known DEXes by dexId substring: (chain, trust tier, emoji). Order decides which emoji wins.
+DEX_REGISTRY = {
+    'raydium': ('solana', 'trusted', '🌊'),
+    'orca': ('solana', 'trusted', '🐋'),
+    'jupiter': ('solana', 'trusted', '🪐'),
+    'pumpfun': ('solana', 'major', '💎'),
+    'pump.fun': ('solana', 'major', '💎'),
+    'moonshot': ('solana', 'major', '🌙'),
+    'meteora': ('solana', 'unknown', '☄️'),
+    'serum': ('solana', 'unknown', '🧬'),
+    'aldrin': ('solana', 'unknown', '⚡'),
+    'bonkswap': ('solana', 'unknown', None),
+}
+DEFAULT_DEX_EMOJI = "🏪"
+
+class DexInfo:
+    """Classification record for one dexId"""
+    
+    __slots__ = ('dex_id', 'chain', 'tier', 'emoji', 'name')
+    
+    def __init__(self, dex_id: str, chain: Optional[str], tier: str, emoji: str, name: str):
+        self.dex_id = dex_id
+        self.chain = chain
+        self.tier = tier
+        self.emoji = emoji
+        self.name = name
+
+@lru_cache(maxsize=4096)
+def classify_dex(dex_id: str) -> DexInfo:
+    """Look up a dexId in DEX_REGISTRY once; later calls hit the memo"""
+    key = dex_id.lower()
+    matches = [entry for dex, entry in DEX_REGISTRY.items() if dex in key]
+    tiers = {tier for _, tier, _ in matches}
+    
+    return DexInfo(
+        dex_id,
+        chain=matches[0][0] if matches else None,
+        # A non-traditional launchpad match outranks a trusted one
+        tier='major' if 'major' in tiers else 'trusted' if 'trusted' in tiers else 'unknown',
+        emoji=next((emoji for _, _, emoji in matches if emoji), DEFAULT_DEX_EMOJI),
+        name=(dex_id or 'Unknown DEX').title()
+    )
+
+class PairColumns:
+    """Columnar NumPy view of a scan's PairSnapshots for vectorized filtering and scoring"""
+    
+    COLUMNS = (
+        'has_base', 'is_solana', 'market_cap', 'price_usd', 'age_minutes', 'volume_24h',
+        'liquidity_usd', 'liquidity_valid', 'txns_5m', 'txns_1h', 'has_txns_1h', 'activity_valid',
+        'abs_price_change_24h', 'has_links', 'dex_tier'
+    )
+    
+    def __init__(self, snapshots: List[PairSnapshot], is_solana: Optional[List[bool]] = None):
+        n = len(snapshots)
+        self.snapshots = snapshots
+        self.size = n
+        
+        def column(values, dtype=np.float64):
+            return np.fromiter(values, dtype=dtype, count=n)
+        
+        self.has_base = column((bool(s.base_address) for s in snapshots), bool)
+        self.is_solana = np.ones(n, dtype=bool) if is_solana is None else np.asarray(is_solana, dtype=bool).reshape(n)
+        self.market_cap = column(s.market_cap for s in snapshots)
+        self.price_usd = column(s.price_usd for s in snapshots)
+        self.age_minutes = column(np.nan if s.age_minutes is None else s.age_minutes for s in snapshots)
+        self.volume_24h = column(s.volume_24h for s in snapshots)
+        self.liquidity_usd = column(s.liquidity_usd for s in snapshots)
+        self.liquidity_valid = column((s.liquidity_valid for s in snapshots), bool)
+        self.txns_5m = column(s.txns_5m for s in snapshots)
+        self.txns_1h = column(s.txns_1h for s in snapshots)
+        self.has_txns_1h = column((s.has_txns_1h for s in snapshots), bool)
+        self.activity_valid = column((s.activity_valid for s in snapshots), bool)
+        self.abs_price_change_24h = np.abs(column(s.price_change_24h for s in snapshots))
+        self.has_links = column((bool(s.websites or s.socials) for s in snapshots), bool)
+        self.dex_tier = column((DEX_TIERS.index(classify_dex(s.dex_id).tier) for s in snapshots), np.int8)
+
+class RuleEngine:
+    """Compiles declarative filter and risk rules into a flat NumPy program, hot-reloaded from RULES_FILE"""
+    
+    OPERATORS = {
+        '<': operator.lt, '<=': operator.le, '>': operator.gt,
+        '>=': operator.ge, '==': operator.eq, '!=': operator.ne
+    }
+    # Weight of the latest scan in each rule's measured rejection rate
+    SELECTIVITY_ALPHA = 0.2
+    
+    def __init__(self, path: str = RULES_FILE):
+        self.path = path
+        self.mtime: Optional[float] = None
+        self.filters: List[Dict] = []
+        self.components: List[Dict] = []
+        self.levels: Tuple[List[float], List[str]] = ([], [])
+        self.max_age_minutes: Optional[float] = None
+        self.install(DEFAULT_RULES)
+        self.maybe_reload()
+    
+    def _load_file(self) -> Dict:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            if self.path.endswith(('.yaml', '.yml')):
+                if yaml is None:
+                    raise ValueError("PyYAML is required for YAML rule files")
+                return yaml.safe_load(f)
+            return json.load(f)
+    
+    def maybe_reload(self) -> bool:
+        """Recompile when the rule file changed on disk; keeps the old program on errors"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self.mtime:
+            return False
+        self.mtime = mtime
+        try:
+            self.install(self._load_file())
+            logger.info(f"[REFRESH] Loaded filter rules from {self.path}")
+            return True
+        except Exception as e:
+            logger.error(f"Invalid rules in {self.path}, keeping previous rules: {e}")
+            return False
+    
+    def install(self, config: Dict):
+        """Compile a rule config and swap it in atomically"""
+        # Like risk, a file without filters keeps the built-in ones; an empty list is a mistake
+        rules = config.get('filters', DEFAULT_RULES['filters'])
+        if not rules:
+            raise ValueError("filters must not be empty")
+        filters = [
+            {'name': rule['name'], 'index': index, 'predicate': self._compile_predicate(rule), 'rejection_rate': 0.0}
+            for index, rule in enumerate(rules)
+        ]
+        risk = config.get('risk', DEFAULT_RULES['risk'])
+        components = [self._compile_component(component) for component in risk.get('components', [])]
+        levels = risk.get('levels', DEFAULT_RULES['risk']['levels'])
+        if len(levels['labels']) != len(levels['thresholds']) + 1:
+            raise ValueError("risk levels need one more label than thresholds")
+        max_age_minutes = self._age_horizon(rules)
+        self.filters, self.components = filters, components
+        self.levels = (list(levels['thresholds']), list(levels['labels']))
+        self.max_age_minutes = max_age_minutes
+    
+    def _age_horizon(self, rules: List[Dict]) -> Optional[float]:
+        """Oldest age any pair can pass with, from top-level age_minutes > / >= rules; None if unbounded"""
+        limits = [
+            self._resolve(rule['value']) for rule in rules
+            if rule.get('column') == 'age_minutes' and rule.get('op') in ('>', '>=')
+        ]
+        return float(min(limits)) if limits else None
+    
+    def _resolve(self, value):
+        if isinstance(value, str) and value.startswith('$'):
+            settings = {
+                'MIN_MARKET_CAP': MIN_MARKET_CAP,
+                'MAX_MARKET_CAP': MAX_MARKET_CAP,
+                'MAX_TOKEN_AGE_MINUTES': MAX_TOKEN_AGE_MINUTES
+            }
+            return settings[value[1:]]
+        if not isinstance(value, (int, float, bool)):
+            raise ValueError(f"unsupported rule value {value!r}")
+        return value
+    
+    def _check_column(self, column: str) -> str:
+        if column not in PairColumns.COLUMNS:
+            raise ValueError(f"unknown column {column!r}")
+        return column
+    
+    def _compile_predicate(self, expr: Dict):
+        """Turn a rule expression into fn(cols, rows) -> boolean mask over rows"""
+        if 'all' in expr or 'any' in expr:
+            combine = np.logical_and if 'all' in expr else np.logical_or
+            parts = [self._compile_predicate(part) for part in expr.get('all', expr.get('any'))]
+            return lambda cols, rows: reduce(combine, (part(cols, rows) for part in parts))
+        if 'not' in expr:
+            inner = self._compile_predicate(expr['not'])
+            return lambda cols, rows: ~inner(cols, rows)
+        
+        column = self._check_column(expr['column'])
+        compare = self.OPERATORS[expr['op']]
+        value = self._resolve(expr['value'])
+        return lambda cols, rows: compare(getattr(cols, column)[rows], value)
+    
+    def _compile_component(self, spec: Dict) -> Dict:
+        """Turn a risk component into a bucket function plus points and factor tables"""
+        if 'ladder' in spec:
+            column = self._check_column(spec['ladder'])
+            thresholds = np.asarray(spec['thresholds'], dtype=np.float64)
+            points = list(spec['points'])
+            factors = list(spec.get('factors') or [None] * len(points))
+            if len(points) != len(thresholds) + 1 or len(factors) != len(points):
+                raise ValueError(f"ladder {column!r} needs one more bucket than thresholds")
+            right = bool(spec.get('right', False))
+            missing = len(points)
+            points.append(spec.get('missing_points', 0))
+            factors.append(spec.get('missing_factor'))
+            
+            def buckets(cols):
+                values = getattr(cols, column)
+                return np.where(np.isnan(values), missing, np.digitize(values, thresholds, right=right))
+        elif 'flag' in spec:
+            column = self._check_column(spec['flag'])
+            value = spec.get('value', True)
+            points = [0, spec['points']]
+            factors = [None, spec.get('factor')]
+            
+            def buckets(cols):
+                return (getattr(cols, column) == value).astype(np.intp)
+        elif 'category' in spec:
+            if spec['category'] != 'dex_tier':
+                raise ValueError(f"unknown category {spec['category']!r}")
+            points = [spec['points'].get(tier, 0) for tier in DEX_TIERS]
+            factors = [spec.get('factors', {}).get(tier) for tier in DEX_TIERS]
+            
+            def buckets(cols):
+                return cols.dex_tier.astype(np.intp)
+        else:
+            raise ValueError(f"unknown risk component {spec!r}")
+        
+        return {'buckets': buckets, 'points': np.asarray(points, dtype=np.int64), 'factors': factors}
+    
+    def evaluate(self, cols: PairColumns) -> Tuple[np.ndarray, Dict[str, int], np.ndarray]:
+        """Run the filter program, most selective rule first, on the rows still alive"""
+        rows = np.arange(cols.size)
+        first_failed = np.full(cols.size, -1, dtype=np.int16)
+        order = sorted(self.filters, key=lambda rule: rule['rejection_rate'], reverse=True)
+        
+        for position, rule in enumerate(order):
+            if not rows.size:
+                break
+            mask = rule['predicate'](cols, rows)
+            rejected = rows[mask]
+            rule['rejection_rate'] += self.SELECTIVITY_ALPHA * (rejected.size / rows.size - rule['rejection_rate'])
+            if not rejected.size:
+                continue
+            rows = rows[~mask]
+            
+            # Report the first failing rule in declared order, so a pair's reason does not
+            # change as the execution order drifts; only rules not yet run on these rows can
+            # still claim them
+            reasons = np.full(rejected.size, rule['index'], dtype=np.int16)
+            pending = np.arange(rejected.size)
+            for earlier in sorted((r for r in order[position + 1:] if r['index'] < rule['index']),
+                                  key=lambda r: r['index']):
+                if not pending.size:
+                    break
+                hit = earlier['predicate'](cols, rejected[pending])
+                reasons[pending[hit]] = earlier['index']
+                pending = pending[~hit]
+            first_failed[rejected] = reasons
+        
+        counts = np.bincount(first_failed[first_failed >= 0], minlength=len(self.filters))
+        rejection_stats = {rule['name']: int(counts[rule['index']]) for rule in self.filters if counts[rule['index']]}
+        passed = np.zeros(cols.size, dtype=bool)
+        passed[rows] = True
+        return passed, rejection_stats, first_failed
+    
+    def rule_name(self, index: int) -> str:
+        return self.filters[index]['name'] if 0 <= index < len(self.filters) else "Unknown"
+    
+    def score(self, cols: PairColumns) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """Risk scores plus the per-component buckets they came from"""
+        scores = np.zeros(cols.size, dtype=np.int64)
+        all_buckets = []
+        for component in self.components:
+            buckets = component['buckets'](cols)
+            scores += component['points'][buckets]
+            all_buckets.append(buckets)
+        return scores, all_buckets
+    
+    def factors(self, all_buckets: List[np.ndarray], row: int) -> List[str]:
+        factors = []
+        for component, buckets in zip(self.components, all_buckets):
+            factor = component['factors'][buckets[row]]
+            if factor:
+                factors.append(factor)
+        return factors
+    
+    def level(self, risk_score: int) -> str:
+        thresholds, labels = self.levels
+        return labels[bisect_left(thresholds, risk_score)]
+
+class RankedPairs:
+    """Bounded best-first buffer of one scan's passing pairs, ranked by risk, freshness and liquidity"""
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.entries: List[Tuple] = []  # sorted best first: (rank key, seq, snapshot)
+        self.seq = 0
+        self.evicted = 0
+        self.closed = False
+        self.changed = asyncio.Event()
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    @staticmethod
+    def rank_key(snap: PairSnapshot) -> Tuple[float, float, float]:
+        age = snap.age_minutes if snap.age_minutes is not None else math.inf
+        return (snap.risk_score or 0, age, -snap.liquidity_usd)
+    
+    def push(self, snap: PairSnapshot) -> Optional[PairSnapshot]:
+        """Rank a pair; returns whichever pair fell off the end, if any"""
+        # A richer copy of a pair already waiting replaces it
+        self.entries = [entry for entry in self.entries if entry[2].pair_id != snap.pair_id]
+        self.seq += 1
+        insort(self.entries, (self.rank_key(snap), self.seq, snap))
+        self.changed.set()
+        if len(self.entries) > self.capacity:
+            self.evicted += 1
+            return self.entries.pop()[2]
+        return None
+    
+    def close(self):
+        """No more pairs are coming this scan"""
+        self.closed = True
+        self.changed.set()
+    
+    async def pop(self) -> Optional[PairSnapshot]:
+        """Wait for the best waiting pair; None once the scan's budget or input is exhausted"""
+        while not self.entries:
+            if self.closed or self.capacity <= 0:
+                return None
+            self.changed.clear()
+            await self.changed.wait()
+        if self.capacity <= 0:
+            return None
+        self.capacity -= 1
+        return self.entries.pop(0)[2]
+    
+    def defer(self):
+        """Give back the slot of a popped pair that could not be sent; it is picked up again next scan"""
+        self.capacity += 1
+        self.evicted += 1
+
+class Subscription:
+    """One chat's alert window over market cap and token age (bounds inclusive)"""
+    
+    __slots__ = ('chat_id', 'min_market_cap', 'max_market_cap', 'min_age_minutes', 'max_age_minutes')
+    
+    def __init__(self, chat_id, min_market_cap: float = MIN_MARKET_CAP, max_market_cap: float = MAX_MARKET_CAP,
+                 min_age_minutes: float = 0, max_age_minutes: float = MAX_TOKEN_AGE_MINUTES):
+        self.chat_id = str(chat_id)
+        self.min_market_cap = float(min_market_cap)
+        self.max_market_cap = float(max_market_cap)
+        self.min_age_minutes = float(min_age_minutes)
+        self.max_age_minutes = float(max_age_minutes)
+    
+    def as_row(self) -> Tuple:
+        return (self.chat_id, self.min_market_cap, self.max_market_cap, self.min_age_minutes, self.max_age_minutes)
+
+class SubscriptionIndex:
+    """Interval index over subscriber windows: a pair is matched against every chat in one lookup per axis"""
+    
+    def __init__(self, subscriptions: List[Subscription] = ()):
+        self.subscriptions: Dict[str, Subscription] = {sub.chat_id: sub for sub in subscriptions}
+        self.rebuild()
+    
+    def __len__(self) -> int:
+        return len(self.subscriptions)
+    
+    def add(self, subscription: Subscription):
+        self.subscriptions[subscription.chat_id] = subscription
+        self.rebuild()
+    
+    def remove(self, chat_id) -> bool:
+        removed = self.subscriptions.pop(str(chat_id), None) is not None
+        if removed:
+            self.rebuild()
+        return removed
+    
+    @staticmethod
+    def _build_axis(intervals: List[Tuple[float, float]]) -> Tuple[np.ndarray, List[int]]:
+        """Split an axis at every interval bound and record which intervals cover each region.
+        
+        With sorted bounds b, region 2i is the open gap below b[i] and region 2i+1 is
+        the point b[i]; each region's value is a bitset of covering intervals.
+        """
+        bounds = np.unique(np.asarray([bound for interval in intervals for bound in interval], dtype=np.float64))
+        regions = [0] * (2 * len(bounds) + 1)
+        for bit, (low, high) in enumerate(intervals):
+            if low > high:
+                continue
+            first = 2 * int(np.searchsorted(bounds, low)) + 1
+            last = 2 * int(np.searchsorted(bounds, high)) + 1
+            for region in range(first, last + 1):
+                regions[region] |= 1 << bit
+        return bounds, regions
+    
+    def rebuild(self):
+        self.chat_ids = list(self.subscriptions)
+        subs = self.subscriptions.values()
+        self.everyone = (1 << len(self.chat_ids)) - 1
+        self.market_cap_axis = self._build_axis([(sub.min_market_cap, sub.max_market_cap) for sub in subs])
+        self.age_axis = self._build_axis([(sub.min_age_minutes, sub.max_age_minutes) for sub in subs])
+    
+    @staticmethod
+    def _lookup(axis: Tuple[np.ndarray, List[int]], values: np.ndarray) -> List[int]:
+        bounds, regions = axis
+        idx = np.searchsorted(bounds, values)
+        exact = idx < len(bounds)
+        exact[exact] = bounds[idx[exact]] == values[exact]
+        return [regions[region] for region in (2 * idx + exact).tolist()]
+    
+    def match_batch(self, snapshots: List[PairSnapshot]) -> List[List[str]]:
+        """Subscribed chat ids for each pair. Unknown market cap or age matches every window on that axis."""
+        if not snapshots or not self.chat_ids:
+            return [[] for _ in snapshots]
+        
+        market_caps = np.fromiter((snap.market_cap for snap in snapshots), dtype=np.float64, count=len(snapshots))
+        ages = np.fromiter((np.nan if snap.age_minutes is None else snap.age_minutes for snap in snapshots),
+                           dtype=np.float64, count=len(snapshots))
+        cap_masks = self._lookup(self.market_cap_axis, market_caps)
+        age_masks = self._lookup(self.age_axis, ages)
+        
+        matches = []
+        for market_cap, age, cap_mask, age_mask in zip(market_caps.tolist(), ages.tolist(), cap_masks, age_masks):
+            mask = (cap_mask if market_cap > 0 else self.everyone) & (self.everyone if math.isnan(age) else age_mask)
+            chats = []
+            while mask:
+                low = mask & -mask
+                chats.append(self.chat_ids[low.bit_length() - 1])
+                mask ^= low
+            matches.append(chats)
+        return matches
+
+class SeenPairs:
+    """Insertion-ordered set of alerted pair ids, each kept until the pair can no longer pass the age filter"""
+    
+    # Ages are measured against the scan clock, expiry against wall time
+    CLOCK_SLACK_SECONDS = 60
+    
+    def __init__(self, ttl_seconds: float = SEEN_PAIRS_TTL_MINUTES * 60, max_size: int = SEEN_PAIRS_MAX):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.entries = OrderedDict()  # pair_id -> expiry time (epoch seconds)
+        self.unsaved: List[Tuple[str, float, float]] = []
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def __contains__(self, pair_id: str) -> bool:
+        expires_at = self.entries.get(pair_id)
+        if expires_at is None:
+            return False
+        if time.time() >= expires_at:
+            del self.entries[pair_id]
+            return False
+        return True
+    
+    def expiry(self, age_minutes: Optional[float], max_age_minutes: Optional[float], now: float) -> float:
+        """When a pair of this age ages out of the filter; unknown ages or no age limit fall back to the TTL"""
+        if age_minutes is None or max_age_minutes is None:
+            return now + self.ttl_seconds
+        return now + max(0.0, max_age_minutes - age_minutes) * 60 + self.CLOCK_SLACK_SECONDS
+    
+    def add(self, pair_id: str, age_minutes: Optional[float] = None, max_age_minutes: Optional[float] = None,
+            seen_at: Optional[float] = None):
+        """Record a pair, evicting the oldest entry when over the size bound"""
+        if seen_at is None:
+            seen_at = time.time()
+        expires_at = self.expiry(age_minutes, max_age_minutes, seen_at)
+        self.entries[pair_id] = expires_at
+        self.entries.move_to_end(pair_id)
+        self.unsaved.append((pair_id, seen_at, expires_at))
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+    
+    def prune(self, now: Optional[float] = None) -> int:
+        """Evict expired entries; returns how many were removed"""
+        if now is None:
+            now = time.time()
+        # Expiry is not monotonic in insertion order, so scan the whole (size-bounded) map
+        expired = [pair_id for pair_id, expires_at in self.entries.items() if expires_at <= now]
+        for pair_id in expired:
+            del self.entries[pair_id]
+        return len(expired)
+    
+    def load(self, rows):
+        """Restore (pair_id, expires_at) rows ordered oldest first"""
+        for pair_id, expires_at in rows:
+            self.entries[pair_id] = expires_at
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+    
+    def take_unsaved(self) -> List[Tuple[str, float, float]]:
+        """Return and clear the entries added since the last call"""
+        unsaved, self.unsaved = self.unsaved, []
+        return unsaved
+
+class BotStateStore:
+    """SQLite (WAL mode) store for seen pairs and stats counters across restarts"""
+    
+    PERSISTED_STATS = (
+        'total_pairs_found',
+        'total_notifications_sent',
+        'errors',
+        'solana_pairs_processed',
+        'api_calls_made'
+    )
+    
+    def __init__(self, path: str = STATE_DB_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_pairs (pair_id TEXT PRIMARY KEY, seen_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS seen_pairs_expires_at ON seen_pairs (expires_at)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS stats (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS subscriptions (chat_id TEXT PRIMARY KEY, min_market_cap REAL NOT NULL, "
+            "max_market_cap REAL NOT NULL, min_age_minutes REAL NOT NULL, max_age_minutes REAL NOT NULL)"
+        )
+        self.conn.commit()
+    
+    def load_seen_pairs(self, now: float) -> List[Tuple[str, float]]:
+        """(pair_id, expires_at) of unexpired seen pairs, oldest first"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT pair_id, expires_at FROM seen_pairs WHERE expires_at > ? ORDER BY seen_at", (now,)
+            ).fetchall()
+    
+    def load_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.conn.execute("SELECT key, value FROM stats").fetchall())
+    
+    def load_subscriptions(self) -> List[Subscription]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT chat_id, min_market_cap, max_market_cap, min_age_minutes, max_age_minutes FROM subscriptions"
+            ).fetchall()
+        return [Subscription(*row) for row in rows]
+    
+    def save_subscription(self, subscription: Subscription):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO subscriptions VALUES (?, ?, ?, ?, ?)", subscription.as_row())
+    
+    def delete_subscription(self, chat_id: str):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM subscriptions WHERE chat_id = ?", (chat_id,))
+    
+    def save(self, new_pairs: List[Tuple[str, float, float]], stats: Dict, now: float):
+        """Write new seen pairs and counters in one transaction and expire old rows"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO seen_pairs (pair_id, seen_at, expires_at) VALUES (?, ?, ?)", new_pairs
+            )
+            self.conn.execute("DELETE FROM seen_pairs WHERE expires_at <= ?", (now,))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO stats (key, value) VALUES (?, ?)",
+                [(key, int(stats.get(key, 0))) for key in self.PERSISTED_STATS]
+            )
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
 class SolanaCryptoBot:
     def __init__(self):
         self.bot = Bot(token=TELEGRAM_BOT_TOKEN)
-        self.processed_pairs = set()
+        self.outbox = TelegramOutbox(self.bot.send_message)
+        self.processed_pairs = SeenPairs()
+        self.log_rng = np.random.default_rng()
+        # Chats that receive alerts; the configured chat always gets the default window
+        self.subscriptions = SubscriptionIndex([Subscription(TELEGRAM_CHAT_ID)] if TELEGRAM_CHAT_ID else [])
         self.pair_cache = {}
-        self.last_api_call = defaultdict(float)
         self.stats = {
             'total_pairs_found': 0,
             'total_notifications_sent': 0,
@@ -105,129 +2023,200 @@ class SolanaCryptoBot:
             'start_time': datetime.now(timezone.utc).isoformat()
         }
         
-        # Rate limiting settings
+        # Restore dedup state and counters from the previous run
+        self.state_store = BotStateStore()
+        self.load_state()
+        
+        # Rate limiting settings (requests per minute per endpoint class)
         self.api_rate_limits = {
-            'token-profiles': {'calls': 0, 'reset_time': 0, 'limit': 60},
-            'token-boosts': {'calls': 0, 'reset_time': 0, 'limit': 60},
-            'dex-pairs': {'calls': 0, 'reset_time': 0, 'limit': 300},
-            'search': {'calls': 0, 'reset_time': 0, 'limit': 300},
-            'tokens': {'calls': 0, 'reset_time': 0, 'limit': 300}
+            'token-profiles': 60,
+            'token-boosts': 60,
+            'dex-pairs': 300,
+            'search': 300,
+            'tokens': 300,
+            'axiom-query': 60,
+            'axiom-ingest': 60
         }
+        self.rate_limiters = {}
         
-    def safe_log(self, level: str, message: str):
-        """Safe logging that handles unicode errors"""
-        try:
-            # Replace emojis with text equivalents for problematic systems
-            safe_message = message
-            emoji_replacements = {
-                '🔍': '[SEARCH]',
-                '📊': '[STATS]',
-                '💾': '[CACHE]',
-                '😴': '[SLEEP]',
-                '✅': '[SUCCESS]',
-                '❌': '[ERROR]',
-                '⚠️': '[WARNING]',
-                '🚀': '[ROCKET]',
-                '💥': '[BOOM]',
-                '🎯': '[TARGET]',
-                '📤': '[SEND]',
-                '🔄': '[REFRESH]',
-                '💎': '[DIAMOND]',
-                '🌊': '[WAVE]',
-                '🐋': '[WHALE]',
-                '🪐': '[PLANET]',
-                '🌙': '[MOON]',
-                '💰': '[MONEY]',
-                '💵': '[DOLLAR]',
-                '📈': '[UP]',
-                '📉': '[DOWN]',
-                '⬆️': '[UP_ARROW]',
-                '⬇️': '[DOWN_ARROW]',
-                '🔗': '[LINK]',
-                '🏪': '[STORE]'
+        # Filter and risk rules, recompiled when RULES_FILE changes
+        self.rule_engine = RuleEngine()
+        
+        # Alerts are batched to Axiom in the background as compressed NDJSON
+        self.axiom_buffer = AxiomIngestBuffer(self.send_axiom_batch, AxiomSpool())
+        self.axiom_encoder = NDJSONEncoder(static_fields={
+            'settings': {
+                'min_market_cap': MIN_MARKET_CAP,
+                'max_market_cap': MAX_MARKET_CAP,
+                'max_age_minutes': MAX_TOKEN_AGE_MINUTES,
+                'check_interval': CHECK_INTERVAL,
+                'query_limit': QUERY_LIMIT,
+                'chain': 'solana'
             }
-            
-            for emoji, replacement in emoji_replacements.items():
-                safe_message = safe_message.replace(emoji, replacement)
-            
-            # Log the safe message
-            getattr(logger, level.lower())(safe_message)
-            
-        except Exception as e:
-            # Ultimate fallback - log without any special characters
-            try:
-                basic_message = f"LOG_ERROR: Could not log original message due to encoding issue: {str(e)}"
-                getattr(logger, level.lower())(basic_message)
-            except:
-                pass
+        })
         
-    def check_rate_limit(self, endpoint_type: str) -> bool:
-        """Check if we can make an API call based on rate limits"""
-        current_time = time.time()
-        rate_limit = self.api_rate_limits.get(endpoint_type, {'calls': 0, 'reset_time': 0, 'limit': 60})
+        # Shared connection pool and per-endpoint concurrency caps
+        self.http_pool = PooledHttpClient()
+        self.endpoint_semaphores = defaultdict(lambda: asyncio.Semaphore(API_MAX_CONCURRENCY))
         
-        # Reset counter if a minute has passed
-        if current_time - rate_limit['reset_time'] >= 60:
-            rate_limit['calls'] = 0
-            rate_limit['reset_time'] = current_time
+        # Latency histograms, counters and gauges; self.stats stays as the persisted lifetime totals
+        self.metrics = MetricsRegistry()
+        self.register_metrics()
         
-        # Check if we're under the limit
-        if rate_limit['calls'] < rate_limit['limit']:
-            rate_limit['calls'] += 1
-            return True
+        # Queues of the scan in progress, reported by /health
+        self.active_pipeline: Optional[Tuple[asyncio.Queue, RankedPairs]] = None
+        self.metrics_server = MetricsServer({
+            '/metrics': self.render_metrics,
+            '/health': self.render_health
+        })
         
-        return False
+    def register_metrics(self):
+        """Expose lifetime totals and component state through the metrics registry"""
+        for key in BotStateStore.PERSISTED_STATS:
+            self.metrics.register_callback('counter', 'bot_events_total', lambda key=key: self.stats[key], event=key)
+        for key in ('sent', 'failed', 'retry_after'):
+            self.metrics.register_callback('counter', 'telegram_messages_total', lambda key=key: self.outbox.stats[key], result=key)
+        self.metrics.register_callback('gauge', 'telegram_outbox_pending', lambda: self.outbox.pending)
+        self.metrics.register_callback('gauge', 'axiom_spool_pending', lambda: self.axiom_buffer.pending)
+        self.metrics.register_callback('gauge', 'seen_pairs', lambda: len(self.processed_pairs))
+        self.metrics.register_callback('gauge', 'subscriptions', lambda: len(self.subscriptions))
+        self.metrics.register_callback('counter', 'http_pool_requests_total', lambda: self.http_pool.get_stats()['requests'])
+        self.metrics.register_callback('counter', 'http_pool_connections_opened_total', lambda: self.http_pool.get_stats()['new_connections'])
+    
+    def render_metrics(self) -> Tuple[int, str, str]:
+        return 200, 'text/plain; version=0.0.4; charset=utf-8', self.metrics.render_prometheus()
+    
+    def render_health(self) -> Tuple[int, str, str]:
+        """Last-scan age and queue depths as JSON; 503 once scans have stalled"""
+        last_scan = self.metrics.series.get(('last_scan_timestamp_seconds', ()))
+        last_scan_age = time.time() - last_scan if last_scan is not None else None
+        uptime = datetime.now(timezone.utc) - datetime.fromisoformat(self.stats['start_time'])
+        stale = (last_scan_age if last_scan_age is not None else uptime.total_seconds()) > HEALTH_MAX_SCAN_AGE
+        
+        queues = {
+            'telegram_outbox': self.outbox.pending,
+            'axiom_spool': self.axiom_buffer.pending
+        }
+        if self.active_pipeline is not None:
+            batches, ranking = self.active_pipeline
+            queues['pipeline_batches'] = batches.qsize()
+            queues['pipeline_ranked'] = len(ranking)
+        
+        health = {
+            'status': 'stale' if stale else 'ok',
+            'last_scan_age_seconds': round(last_scan_age, 3) if last_scan_age is not None else None,
+            'scan_in_progress': self.active_pipeline is not None,
+            'queues': queues,
+            'seen_pairs': len(self.processed_pairs),
+            'subscriptions': len(self.subscriptions),
+            'uptime_seconds': round(uptime.total_seconds())
+        }
+        return 503 if stale else 200, 'application/json', json.dumps(health) + '\n'
+    
+    def safe_log(self, level: str, message: str, *args):
+        """Log through the background queue; %-style args are only formatted if the level is enabled"""
+        level_no = LOG_LEVELS.get(level.lower(), logging.INFO)
+        if logger.isEnabledFor(level_no):
+            logger.log(level_no, message, *args)
+        
+    def get_rate_limiter(self, endpoint_type: str) -> TokenBucket:
+        """Get the token bucket for an endpoint class"""
+        limiter = self.rate_limiters.get(endpoint_type)
+        if limiter is None:
+            limiter = TokenBucket(self.api_rate_limits.get(endpoint_type, 60))
+            self.rate_limiters[endpoint_type] = limiter
+        return limiter
+    
+    def load_state(self):
+        """Load seen pairs and counters from the state store"""
+        try:
+            self.processed_pairs.load(self.state_store.load_seen_pairs(time.time()))
+            for key, value in self.state_store.load_stats().items():
+                if key in self.stats:
+                    self.stats[key] = value
+            for subscription in self.state_store.load_subscriptions():
+                self.subscriptions.add(subscription)
+            self.safe_log('info', f"[CACHE] Restored {len(self.processed_pairs)} seen pairs from {self.state_store.path}")
+        except sqlite3.Error as e:
+            self.safe_log('error', f"Failed to load bot state: {e}")
+    
+    async def save_state(self):
+        """Persist newly seen pairs and counters off the event loop"""
+        new_pairs = self.processed_pairs.take_unsaved()
+        try:
+            await asyncio.to_thread(self.state_store.save, new_pairs, dict(self.stats), time.time())
+        except sqlite3.Error as e:
+            self.processed_pairs.unsaved[:0] = new_pairs
+            self.safe_log('error', f"Failed to save bot state: {e}")
+    
+    async def start(self):
+        """Start background workers and the local metrics endpoint"""
+        self.axiom_buffer.start()
+        await self.metrics_server.start()
     
-    def make_api_request(self, url: str, endpoint_type: str = 'default') -> Optional[Dict]:
+    async def close(self):
+        """Drain the Telegram outbox, flush pending Axiom events, persist state and close the shared connection pool"""
+        await self.metrics_server.stop()
+        await self.outbox.stop()
+        await self.axiom_buffer.stop()
+        await self.save_state()
+        self.state_store.close()
+        await self.http_pool.close()
+    
+    async def make_api_request(self, url: str, endpoint_type: str = 'default') -> Optional[Dict]:
         """Make API request with rate limiting and error handling"""
-        if not self.check_rate_limit(endpoint_type):
-            self.safe_log('warning', f"Rate limit reached for {endpoint_type}, skipping request")
-            return None
+        limiter = self.get_rate_limiter(endpoint_type)
         
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'application/json',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Sec-Fetch-Dest': 'empty',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Site': 'cross-site'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=15)
-            self.stats['api_calls_made'] += 1
-            
-            if response.status_code == 429:
-                self.safe_log('warning', f"Rate limited by server for {url}")
-                time.sleep(5)
-                return None
-            
-            if response.status_code == 404:
-                self.safe_log('warning', f"Endpoint not found: {url}")
-                return None
+        with self.metrics.timer('api_request_seconds', endpoint=endpoint_type) as timer:
+            try:
+                for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+                    waited = time.perf_counter()
+                    await limiter.acquire()
+                    self.metrics.observe('rate_limit_wait_seconds', time.perf_counter() - waited, endpoint=endpoint_type)
+                    async with self.endpoint_semaphores[endpoint_type]:
+                        response = await self.http_pool.get(url)
+                    self.stats['api_calls_made'] += 1
+                    limiter.update_from_headers(response.headers, response.status_code)
+                    
+                    if response.status_code == 429:
+                        # The limiter now waits out Retry-After before the next token
+                        self.metrics.inc('api_rate_limited_total', endpoint=endpoint_type)
+                        self.safe_log('warning', f"Rate limited by server for {url} (attempt {attempt + 1})")
+                        continue
+                    
+                    if response.status_code == 404:
+                        timer.outcome = 'not_found'
+                        self.safe_log('warning', f"Endpoint not found: {url}")
+                        return None
+                        
+                    if response.status_code != 200:
+                        timer.outcome = f"http_{response.status_code}"
+                        self.safe_log('warning', f"API returned {response.status_code} for {url}")
+                        return None
+                        
+                    return response.json()
                 
-            if response.status_code != 200:
-                self.safe_log('warning', f"API returned {response.status_code} for {url}")
+                timer.outcome = 'rate_limited'
+                self.safe_log('warning', f"Giving up on {url} after {RATE_LIMIT_MAX_RETRIES + 1} rate-limited attempts")
                 return None
                 
-            return response.json()
-            
-        except requests.exceptions.Timeout:
-            self.safe_log('warning', f"Timeout for {url}")
-            return None
-        except requests.exceptions.RequestException as e:
-            self.safe_log('error', f"Request error for {url}: {e}")
-            return None
-        except json.JSONDecodeError as e:
-            self.safe_log('error', f"JSON decode error for {url}: {e}")
-            return None
+            except httpx.TimeoutException:
+                timer.outcome = 'timeout'
+                self.safe_log('warning', f"Timeout for {url}")
+                return None
+            except httpx.HTTPError as e:
+                timer.outcome = 'transport_error'
+                self.safe_log('error', f"Request error for {url}: {e}")
+                return None
+            except json.JSONDecodeError as e:
+                timer.outcome = 'bad_json'
+                self.safe_log('error', f"JSON decode error for {url}: {e}")
+                return None
     
-    def fetch_latest_token_profiles(self) -> List[Dict]:
+    async def fetch_latest_token_profiles(self) -> List[Dict]:
         """Fetch latest token profiles"""
         url = f"{DEX_API_BASE_URL}{TOKEN_PROFILES_LATEST_V1_ENDPOINT}"
-        data = self.make_api_request(url, 'token-profiles')
+        data = await self.make_api_request(url, 'token-profiles')
         
         if not data:
             return []
@@ -240,170 +2229,218 @@ class SolanaCryptoBot:
         
         return []
     
-    def fetch_boosted_tokens(self) -> List[Dict]:
+    async def fetch_boosted_tokens(self) -> List[Dict]:
         """Fetch boosted tokens"""
         endpoints = [
             f"{DEX_API_BASE_URL}{TOKEN_BOOSTS_LATEST_V1_ENDPOINT}",
             f"{DEX_API_BASE_URL}{TOKEN_BOOSTS_TOP_V1_ENDPOINT}"
         ]
         
+        results = await asyncio.gather(*(self.make_api_request(url, 'token-boosts') for url in endpoints))
+        
         all_tokens = []
-        for url in endpoints:
-            data = self.make_api_request(url, 'token-boosts')
-            if data:
-                if isinstance(data, list):
-                    solana_tokens = [item for item in data if self.is_solana_token_profile(item)]
-                    all_tokens.extend(solana_tokens)
-                time.sleep(1)  # Small delay between requests
+        for data in results:
+            if data and isinstance(data, list):
+                solana_tokens = [item for item in data if self.is_solana_token_profile(item)]
+                all_tokens.extend(solana_tokens)
         
         return all_tokens
     
-    def fetch_solana_pairs_by_search(self) -> List[Dict]:
+    async def fetch_search_term(self, term: str) -> List[Dict]:
+        """Search DexScreener for a single keyword"""
+        url = f"{DEX_API_BASE_URL}{DEX_SEARCH_ENDPOINT}?q={term}"
+        data = await self.make_api_request(url, 'search')
+        
+        if data and 'pairs' in data:
+            solana_pairs = [pair for pair in data['pairs'] if self.is_solana_pair(pair)]
+            self.safe_log('info', f"Found {len(solana_pairs)} Solana pairs for '{term}'")
+            return solana_pairs
+        
+        return []
+    
+    async def fetch_solana_pairs_by_search(self) -> List[Dict]:
         """Search for Solana pairs using various DEX keywords"""
         search_terms = ['raydium', 'orca', 'jupiter', 'pumpfun', 'moonshot']
-        all_pairs = []
+        results = await asyncio.gather(*(self.fetch_search_term(term) for term in search_terms))
         
-        for term in search_terms:
-            url = f"{DEX_API_BASE_URL}{DEX_SEARCH_ENDPOINT}?q={term}"
-            data = self.make_api_request(url, 'search')
-            
-            if data and 'pairs' in data:
-                solana_pairs = [pair for pair in data['pairs'] if self.is_solana_pair(pair)]
-                all_pairs.extend(solana_pairs)
-                self.safe_log('info', f"Found {len(solana_pairs)} Solana pairs for '{term}'")
-            
-            time.sleep(1)  # Rate limiting
+        all_pairs = []
+        for pairs in results:
+            all_pairs.extend(pairs)
         
         return all_pairs
     
-    def fetch_token_pairs_by_address(self, token_addresses: List[str]) -> List[Dict]:
+    async def fetch_token_pairs_by_address(self, token_addresses: List[str]) -> List[Dict]:
         """Fetch pairs for specific token addresses"""
-        all_pairs = []
-        
         # Process addresses in batches of 30 (API limit)
-        for i in range(0, len(token_addresses), 30):
-            batch = token_addresses[i:i+30]
-            addresses_str = ','.join(batch)
-            
-            url = f"{DEX_API_BASE_URL}{TOKENS_V1_ENDPOINT}{addresses_str}"
-            data = self.make_api_request(url, 'tokens')
-            
+        urls = [
+            f"{DEX_API_BASE_URL}{TOKENS_V1_ENDPOINT}{','.join(token_addresses[i:i+30])}"
+            for i in range(0, len(token_addresses), 30)
+        ]
+        results = await asyncio.gather(*(self.make_api_request(url, 'tokens') for url in urls))
+        
+        all_pairs = []
+        for data in results:
             if data and isinstance(data, list):
                 all_pairs.extend(data)
-            
-            time.sleep(1)  # Rate limiting
         
         return all_pairs
     
-    def fetch_from_axiom(self, query: str) -> List[Dict]:
+    async def fetch_from_axiom(self, query: str) -> List[Dict]:
         """Fetch data from Axiom API"""
-        try:
-            headers = {
-                'Authorization': f'Bearer {AXIOM_TOKEN}',
-                'Content-Type': 'application/json'
-            }
-            data = {
-                "apl": query
-            }
-            response = requests.post(f"{AXIOM_API_ENDPOINT}/datasets/_apl?format=tabular", headers=headers, json=data, timeout=15)
-            
-            if response.status_code == 200:
-                return response.json().get('tables', [])
-            else:
-                self.safe_log('warning', f"Axiom API returned {response.status_code} for query: {query}")
+        with self.metrics.timer('axiom_query_seconds') as timer:
+            try:
+                headers = {
+                    'Authorization': f'Bearer {AXIOM_TOKEN}',
+                    'Content-Type': 'application/json'
+                }
+                data = {
+                    "apl": query
+                }
+                limiter = self.get_rate_limiter('axiom-query')
+                await limiter.acquire()
+                response = await self.http_pool.post(f"{AXIOM_API_ENDPOINT}/datasets/_apl?format=tabular", headers=headers, json=data)
+                limiter.update_from_headers(response.headers, response.status_code)
+                
+                if response.status_code == 200:
+                    return response.json().get('tables', [])
+                else:
+                    timer.outcome = f"http_{response.status_code}"
+                    self.safe_log('warning', f"Axiom API returned {response.status_code} for query: {query}")
+                    return []
+            except Exception as e:
+                timer.outcome = 'error'
+                self.safe_log('error', f"Error fetching from Axiom: {e}")
                 return []
-        except Exception as e:
-            self.safe_log('error', f"Error fetching from Axiom: {e}")
-            return []
 
-    def fetch_solana_pairs(self) -> List[Dict]:
-        """Enhanced method to fetch Solana pairs from multiple sources"""
+    async def fetch_search_source(self) -> List[Dict]:
+        """Source 1: search-based fetching from DexScreener"""
+        self.safe_log('info', "Fetching from DexScreener API...")
+        search_pairs = await self.fetch_solana_pairs_by_search()
+        self.safe_log('info', f"Found {len(search_pairs)} pairs from DexScreener search.")
+        return search_pairs
+    
+    async def fetch_axiom_source(self) -> List[Dict]:
+        """Source 2: pairs previously logged to Axiom"""
+        self.safe_log('info', "Fetching from Axiom API...")
+        axiom_query = "['crypto-logs'] | where chain == 'solana'"
+        axiom_pairs = await self.fetch_from_axiom(axiom_query)
+        if not axiom_pairs:
+            return []
+        
+        # Process axiom_pairs to match the format of dexscreener pairs
+        processed_axiom_pairs = []
+        for table in axiom_pairs:
+            for row in table.get('columns', []):
+                # Assuming the columns are in a specific order
+                # This part needs to be adjusted based on the actual data structure from Axiom
+                pair = {
+                    'baseToken': {'address': row[0]},
+                    'quoteToken': {'address': row[1]},
+                    # ... other fields
+                }
+                processed_axiom_pairs.append(pair)
+        self.safe_log('info', f"Found {len(processed_axiom_pairs)} pairs from Axiom.")
+        return processed_axiom_pairs
+    
+    async def fetch_profile_source(self) -> List[Dict]:
+        """Source 3: latest token profiles (converted to pairs) from DexScreener"""
+        self.safe_log('info', "Fetching latest token profiles from DexScreener API...")
+        profile_tokens = await self.fetch_latest_token_profiles()
+        token_addresses = [token.get('tokenAddress') for token in profile_tokens if token.get('tokenAddress')]
+        if not token_addresses:
+            return []
+        
+        profile_pairs = await self.fetch_token_pairs_by_address(token_addresses)
+        self.safe_log('info', f"Found {len(profile_pairs)} pairs from DexScreener profiles.")
+        return profile_pairs
+    
+    async def fetch_boosted_source(self) -> List[Dict]:
+        """Source 4: boosted tokens (converted to pairs) from DexScreener"""
+        self.safe_log('info', "Fetching boosted tokens from DexScreener API...")
+        boosted_tokens = await self.fetch_boosted_tokens()
+        token_addresses = [token.get('tokenAddress') for token in boosted_tokens if token.get('tokenAddress')]
+        if not token_addresses:
+            return []
+        
+        boosted_pairs = await self.fetch_token_pairs_by_address(token_addresses)
+        self.safe_log('info', f"Found {len(boosted_pairs)} pairs from DexScreener boosted tokens.")
+        return boosted_pairs
+    
+    async def fetch_stage(self, batches: asyncio.Queue):
+        """Pipeline stage 1: fetch all sources concurrently, queueing each one's pairs as soon as it returns"""
+        SCAN_STAGE.set('fetch')
+        
+        async def run_source(name: str, source):
+            try:
+                with self.metrics.timer('source_fetch_seconds', source=name):
+                    pairs = await source
+            except Exception as e:
+                self.safe_log('error', f"Source fetch failed ({name}): {e}")
+                self.stats['errors'] += 1
+                return
+            self.metrics.inc('source_pairs_total', len(pairs or []), source=name)
+            if pairs:
+                await batches.put(pairs)
+        
         try:
-            all_pairs = []
-            
             self.safe_log('info', "Fetching Solana pairs from multiple sources...")
-            
-            # 1. Search-based fetching from DexScreener
-            self.safe_log('info', "Fetching from DexScreener API...")
-            search_pairs = self.fetch_solana_pairs_by_search()
-            all_pairs.extend(search_pairs)
-            self.safe_log('info', f"Found {len(search_pairs)} pairs from DexScreener search.")
-
-            # 2. Fetch from Axiom
-            self.safe_log('info', "Fetching from Axiom API...")
-            axiom_query = "['crypto-logs'] | where chain == 'solana'"
-            axiom_pairs = self.fetch_from_axiom(axiom_query)
-            if axiom_pairs:
-                # Process axiom_pairs to match the format of dexscreener pairs
-                processed_axiom_pairs = []
-                for table in axiom_pairs:
-                    for row in table.get('columns', []):
-                        # Assuming the columns are in a specific order
-                        # This part needs to be adjusted based on the actual data structure from Axiom
-                        pair = {
-                            'baseToken': {'address': row[0]},
-                            'quoteToken': {'address': row[1]},
-                            # ... other fields
-                        }
-                        processed_axiom_pairs.append(pair)
-                all_pairs.extend(processed_axiom_pairs)
-                self.safe_log('info', f"Found {len(processed_axiom_pairs)} pairs from Axiom.")
-
-            # 3. Latest token profiles (converted to pairs) from DexScreener
-            self.safe_log('info', "Fetching latest token profiles from DexScreener API...")
-            profile_tokens = self.fetch_latest_token_profiles()
-            if profile_tokens:
-                token_addresses = [token.get('tokenAddress') for token in profile_tokens if token.get('tokenAddress')]
-                if token_addresses:
-                    profile_pairs = self.fetch_token_pairs_by_address(token_addresses)
-                    all_pairs.extend(profile_pairs)
-                    self.safe_log('info', f"Found {len(profile_pairs)} pairs from DexScreener profiles.")
-            
-            # 4. Boosted tokens (converted to pairs) from DexScreener
-            self.safe_log('info', "Fetching boosted tokens from DexScreener API...")
-            boosted_tokens = self.fetch_boosted_tokens()
-            if boosted_tokens:
-                token_addresses = [token.get('tokenAddress') for token in boosted_tokens if token.get('tokenAddress')]
-                if token_addresses:
-                    boosted_pairs = self.fetch_token_pairs_by_address(token_addresses)
-                    all_pairs.extend(boosted_pairs)
-                    self.safe_log('info', f"Found {len(boosted_pairs)} pairs from DexScreener boosted tokens.")
-            
-            if not all_pairs:
-                self.safe_log('warning', "No pairs data received from any source")
-                return []
-            
-            # Remove duplicates
-            unique_pairs = self.remove_duplicate_pairs(all_pairs)
-            
-            self.stats['solana_pairs_processed'] += len(unique_pairs)
-            self.safe_log('info', f"Total unique Solana pairs: {len(unique_pairs)}")
-            
-            return unique_pairs
-            
-        except Exception as e:
-            self.safe_log('error', f"Error fetching Solana data: {e}")
-            self.stats['errors'] += 1
-            return []
+            await asyncio.gather(
+                run_source('search', self.fetch_search_source()),
+                run_source('axiom', self.fetch_axiom_source()),
+                run_source('profiles', self.fetch_profile_source()),
+                run_source('boosted', self.fetch_boosted_source())
+            )
+        finally:
+            await batches.put(None)
+    
+    # Fields that make a pair record useful downstream, used to pick between duplicates
+    PAIR_DETAIL_FIELDS = ('txns', 'liquidity', 'volume', 'priceUsd', 'fdv', 'marketCap',
+                          'pairCreatedAt', 'priceChange', 'info', 'dexId', 'url')
+    
+    def pair_richness(self, pair: Dict) -> int:
+        """Count how many detail fields a pair record actually carries"""
+        return sum(1 for field in self.PAIR_DETAIL_FIELDS if pair.get(field))
+    
+    @staticmethod
+    def _address_key(value) -> str:
+        # Axiom rows echo back whatever was logged, so addresses are not always strings
+        if isinstance(value, str):
+            return sys.intern(value)
+        return str(value) if value else ''
+    
+    def pair_key(self, pair: Dict) -> Tuple[str, str, str]:
+        """Interned (pair, base, quote) address tuple identifying a pair across sources"""
+        base_token = pair.get('baseToken') or {}
+        quote_token = pair.get('quoteToken') or {}
+        return (
+            self._address_key(pair.get('pairAddress')),
+            self._address_key(base_token.get('address')),
+            self._address_key(quote_token.get('address'))
+        )
     
     def remove_duplicate_pairs(self, pairs: List[Dict]) -> List[Dict]:
-        """Remove duplicate pairs based on multiple identifiers"""
-        seen_pairs = set()
+        """Merge duplicate pairs across sources, keeping the richest record"""
+        index = {}
         unique_pairs = []
         
         for pair in pairs:
-            # Create unique identifier from multiple fields
-            pair_addr = pair.get('pairAddress', '')
-            base_token_addr = pair.get('baseToken', {}).get('address', '')
-            quote_token_addr = pair.get('quoteToken', {}).get('address', '')
-            
-            # Create hash of multiple identifiers
-            identifier_string = f"{pair_addr}-{base_token_addr}-{quote_token_addr}"
-            identifier_hash = hashlib.md5(identifier_string.encode()).hexdigest()
-            
-            if identifier_hash not in seen_pairs:
-                seen_pairs.add(identifier_hash)
+            key = self.pair_key(pair)
+            slot = index.get(key)
+            if slot is None:
+                index[key] = len(unique_pairs)
                 unique_pairs.append(pair)
+                continue
+            
+            # Keep the richer copy in the first-seen position and backfill
+            # any fields only the other copy has
+            kept = unique_pairs[slot]
+            if self.pair_richness(pair) > self.pair_richness(kept):
+                kept, pair = pair, kept
+            merged = dict(kept)
+            for field, value in pair.items():
+                if value and not merged.get(field):
+                    merged[field] = value
+            unique_pairs[slot] = merged
         
         return unique_pairs
     
@@ -419,13 +2456,7 @@ class SolanaCryptoBot:
                 return True
             
             # Check DEX
-            dex_id = str(pair.get('dexId', '')).lower()
-            solana_dexes = [
-                'raydium', 'orca', 'serum', 'jupiter', 'moonshot', 
-                'pumpfun', 'pump.fun', 'bonkswap', 'aldrin', 'meteora'
-            ]
-            
-            if any(dex in dex_id for dex in solana_dexes):
+            if classify_dex(str(pair.get('dexId', ''))).chain == 'solana':
                 return True
             
             # Check token addresses
@@ -442,369 +2473,152 @@ class SolanaCryptoBot:
             return False
     
     def is_solana_address(self, address: str) -> bool:
-        """Improved Solana address validation"""
-        try:
-            if not address or len(address) < 32:
-                return False
-            
-            # Known Solana token addresses
-            known_solana_tokens = [
-                'So11111111111111111111111111111111111111112',  # WSOL
-                'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v',  # USDC
-                'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB',  # USDT
-                '11111111111111111111111111111111',  # System Program
-            ]
-            
-            if address in known_solana_tokens:
-                return True
-            
-            # Length check (Solana addresses are typically 32-44 characters)
-            if not (32 <= len(address) <= 50):
-                return False
-            
-            # Base58 character check
-            base58_chars = set('123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz')
-            if not all(c in base58_chars for c in address):
-                return False
-            
-            # Common Solana patterns
-            solana_patterns = ['So11', '11111', 'EPjF', 'TokenkegQfeZyiN', 'ATokenGP']
-            if any(pattern in address for pattern in solana_patterns):
-                return True
-            
-            # If it passes all checks and has the right format, likely Solana
-            return True
-            
-        except:
+        """Solana address validation (memoized base58 / 32-byte key check)"""
+        if not address or not isinstance(address, str):
             return False
+        return is_solana_pubkey(address)
     
-    def get_token_age_minutes(self, pair: Dict) -> Optional[float]:
-        """Calculate token age in minutes"""
-        try:
-            pair_created_at = pair.get('pairCreatedAt', 0)
-            if not pair_created_at:
-                return None
-            
-            created_time = datetime.fromtimestamp(pair_created_at / 1000, tz=timezone.utc)
-            age_delta = datetime.now(timezone.utc) - created_time
-            return age_delta.total_seconds() / 60
-            
-        except Exception as e:
-            self.safe_log('warning', f"Error calculating age: {str(e)}")
-            return None
-    
-    def is_pair_promising(self, pair: Dict) -> Tuple[bool, str]:
-        """Enhanced filtering with detailed analysis"""
-        try:
-            base_token = pair.get('baseToken', {})
-            if not base_token or not base_token.get('address'):
-                return False, "Missing base token data"
-            
-            token_symbol = base_token.get('symbol', 'UNKNOWN')
-            
-            # Solana check
-            if not self.is_solana_pair(pair):
-                return False, f"{token_symbol}: Not a Solana pair"
-            
-            # Market cap validation
-            market_cap = 0
-            fdv = pair.get('fdv') or pair.get('marketCap')
-            
-            if fdv:
-                try:
-                    market_cap = float(fdv)
-                except (ValueError, TypeError):
-                    market_cap = 0
-            
-            if market_cap == 0:
-                # Try alternative calculation
-                try:
-                    price_usd = float(pair.get('priceUsd', 0) or 0)
-                    if price_usd <= 0:
-                        return False, f"{token_symbol}: No market cap or price data"
-                except:
-                    return False, f"{token_symbol}: Invalid price data"
-            
-            if market_cap > 0 and not (MIN_MARKET_CAP <= market_cap <= MAX_MARKET_CAP):
-                return False, f"{token_symbol}: Market cap ${market_cap:,.0f} outside range (${MIN_MARKET_CAP:,}-${MAX_MARKET_CAP:,})"
-            
-            # Age validation
-            age_minutes = self.get_token_age_minutes(pair)
-            if age_minutes is not None:
-                if age_minutes > MAX_TOKEN_AGE_MINUTES:
-                    return False, f"{token_symbol}: Too old ({age_minutes:.1f} minutes, max {MAX_TOKEN_AGE_MINUTES})"
-                if age_minutes < 0:
-                    return False, f"{token_symbol}: Invalid timestamp"
-            
-            # Volume check
-            volume_24h = 0
-            try:
-                volume_data = pair.get('volume', {})
-                volume_24h = float(volume_data.get('h24', 0) or 0)
-            except:
-                volume_24h = 0
-            
-            if volume_24h < 100:
-                return False, f"{token_symbol}: Low volume ${volume_24h:,.0f}"
-            
-            # Price validation
-            try:
-                price_usd = float(pair.get('priceUsd', 0) or 0)
-                if price_usd <= 0:
-                    return False, f"{token_symbol}: No valid price data"
-            except:
-                return False, f"{token_symbol}: Invalid price format"
-            
-            # Liquidity check
-            liquidity_usd = 0
-            try:
-                liquidity_data = pair.get('liquidity', {})
-                liquidity_usd = float(liquidity_data.get('usd', 0) or 0)
-                if liquidity_usd < 1000:  # Minimum $1000 liquidity
-                    return False, f"{token_symbol}: Low liquidity ${liquidity_usd:,.0f}"
-            except:
-                pass  # Liquidity check is optional
-            
-            # Transaction activity check
+    def normalize_pairs(self, pairs: List[Dict], scan_ms: Optional[int] = None) -> List[PairSnapshot]:
+        """Parse raw pairs into PairSnapshot records once per scan, aging them all against one clock"""
+        ages = pair_ages_minutes(pairs, scan_ms if scan_ms is not None else now_ms()).tolist()
+        snapshots = []
+        for pair, age in zip(pairs, ages):
             try:
-                txns = pair.get('txns', {})
-                txns_5m = 0
-                if 'm5' in txns:
-                    buys = txns['m5'].get('buys', 0) or 0
-                    sells = txns['m5'].get('sells', 0) or 0
-                    txns_5m = buys + sells
-                
-                if txns_5m == 0:
-                    # Check 1h transactions as fallback
-                    if 'h1' in txns:
-                        buys_1h = txns['h1'].get('buys', 0) or 0
-                        sells_1h = txns['h1'].get('sells', 0) or 0
-                        if buys_1h + sells_1h < 5:
-                            return False, f"{token_symbol}: Very low activity"
-            except:
-                pass  # Activity check is optional
-            
-            age_str = f"{age_minutes:.1f}m" if age_minutes is not None else "Unknown"
-            dex_id = pair.get('dexId', 'Unknown')
-            
-            self.safe_log('info', f"[SUCCESS] {token_symbol} passed all filters (MC: ${market_cap:,.0f}, Age: {age_str}, DEX: {dex_id})")
-            return True, f"{token_symbol}: All checks passed"
-            
-        except Exception as e:
-            self.safe_log('error', f"Error in filtering pair: {str(e)}")
-            return False, f"Filter error: {str(e)}"
+                snapshots.append(PairSnapshot(pair, None if math.isnan(age) else age))
+            except Exception as e:
+                self.safe_log('warning', f"Error normalizing pair: {e}")
+        return snapshots
     
-    def filter_pairs_by_criteria(self, pairs: List[Dict]) -> List[Dict]:
-        """Filter pairs with comprehensive logging"""
+    def filter_pairs_by_criteria(self, pairs: List[PairSnapshot],
+                                 rejections: Optional[Dict[str, int]] = None) -> List[PairSnapshot]:
+        """Filter pairs, adding rejection counts to the scan's rejections and logging a sample of rejected pairs"""
         filtered_pairs = []
-        rejection_stats = defaultdict(int)
         
         self.safe_log('info', f"Filtering {len(pairs)} Solana pairs...")
         
-        for pair in pairs:
-            is_promising, reason = self.is_pair_promising(pair)
-            
-            if not is_promising:
-                # Categorize rejection reason
-                category = reason.split(':')[0] if ':' in reason else reason
-                rejection_stats[category] += 1
-                self.safe_log('info', f"Pair rejected: {reason}")
-                continue
-            
-            # Check if already processed
-            base_token = pair.get('baseToken', {})
-            pair_id = f"{pair.get('pairAddress', '')}-{base_token.get('address', '')}"
+        expired = self.processed_pairs.prune()
+        if expired:
+            self.safe_log('info', f"Expired {expired} processed pairs")
+        
+        self.rule_engine.maybe_reload()
+        
+        if not pairs:
+            return filtered_pairs
+        
+        is_solana = [self.is_solana_pair(snap.raw) for snap in pairs]
+        cols = PairColumns(pairs, is_solana)
+        passed, rejection_stats, first_failed = self.rule_engine.evaluate(cols)
+        
+        # Every rejection at DEBUG, otherwise a LOG_EVENT_SAMPLE_RATE sample at INFO
+        rejected = np.flatnonzero(~passed)
+        if logger.isEnabledFor(logging.DEBUG):
+            level, sample_rate = logging.DEBUG, 1.0
+        else:
+            level, sample_rate = logging.INFO, LOG_EVENT_SAMPLE_RATE
+            rejected = rejected[self.log_rng.random(rejected.size) < sample_rate] if sample_rate > 0 else rejected[:0]
+        if rejected.size and logger.isEnabledFor(level):
+            for i in rejected:
+                snap = pairs[i]
+                reason = self.rule_engine.rule_name(first_failed[i])
+                logger.log(level, "Pair rejected: %s: %s", snap.symbol or 'UNKNOWN', reason, extra={
+                    'event': 'pair_rejected', 'pair_id': snap.pair_id, 'symbol': snap.symbol,
+                    'reason': reason_category(reason), 'sample_rate': sample_rate
+                })
+        
+        log_passes = logger.isEnabledFor(logging.INFO)
+        for i in np.flatnonzero(passed):
+            snap = pairs[i]
+            if log_passes:
+                age_str = f"{snap.age_minutes:.1f}m" if snap.age_minutes is not None else "Unknown"
+                logger.info(
+                    f"[SUCCESS] {snap.symbol or 'UNKNOWN'} passed all filters (MC: ${snap.market_cap:,.0f}, Age: {age_str}, DEX: {snap.dex_id or 'Unknown'})",
+                    extra={'event': 'pair_passed', 'pair_id': snap.pair_id, 'symbol': snap.symbol}
+                )
             
-            if pair_id not in self.processed_pairs:
-                filtered_pairs.append(pair)
-                self.processed_pairs.add(pair_id)
-                
-                # Clean up old processed pairs periodically
-                if len(self.processed_pairs) > 2000:
-                    old_pairs = list(self.processed_pairs)[:-1000]
-                    self.processed_pairs -= set(old_pairs)
-                    self.safe_log('info', "Cleaned up old processed pairs")
-        
-        # Log rejection statistics
-        if rejection_stats:
-            self.safe_log('info', "Rejection statistics:")
-            for reason, count in sorted(rejection_stats.items(), key=lambda x: x[1], reverse=True):
-                self.safe_log('info', f"   - {reason}: {count}")
+            # Check if already processed; pairs are only marked once they are notified
+            if snap.pair_id not in self.processed_pairs:
+                filtered_pairs.append(snap)
+        
+        # Per-batch counts are debug detail; the scan summary reports the totals
+        for reason, count in rejection_stats.items():
+            self.metrics.inc('pairs_rejected_total', count, reason=reason_category(reason))
+            if rejections is not None:
+                rejections[reason] = rejections.get(reason, 0) + count
+        if rejection_stats and logger.isEnabledFor(logging.DEBUG):
+            self.safe_log('debug', "Batch rejection statistics: %s", rejection_stats)
         
         self.stats['total_pairs_found'] += len(filtered_pairs)
         self.safe_log('info', f"[SUCCESS] {len(filtered_pairs)} pairs passed all filters")
         
         return filtered_pairs
     
-    def calculate_comprehensive_risk_score(self, pair: Dict) -> Tuple[str, List[str], int]:
-        """Enhanced risk scoring system"""
-        risk_score = 0
-        risk_factors = []
+    def score_pairs(self, snapshots: List[PairSnapshot]) -> np.ndarray:
+        """Vectorized risk scores for a batch of pairs (also stored on each snapshot)"""
+        if not snapshots:
+            return np.zeros(0, dtype=np.int64)
         
+        scores, _ = self.rule_engine.score(PairColumns(snapshots))
+        for snap, score in zip(snapshots, scores.tolist()):
+            snap.risk_score = score
+        return scores
+    
+    def risk_factors(self, snap: PairSnapshot) -> List[str]:
+        """Human-readable risk factors for one pair, built only for pairs we notify on"""
+        _, all_buckets = self.rule_engine.score(PairColumns([snap]))
+        return self.rule_engine.factors(all_buckets, 0)
+    
+    def calculate_comprehensive_risk_score(self, snap: PairSnapshot) -> Tuple[str, List[str], int]:
+        """Enhanced risk scoring system"""
         try:
-            # Market cap risk
-            market_cap = float(pair.get('fdv', 0) or pair.get('marketCap', 0) or 0)
-            if market_cap < 10000:
-                risk_score += 3
-                risk_factors.append("Very Low Market Cap (<$10K)")
-            elif market_cap < 25000:
-                risk_score += 2
-                risk_factors.append("Low Market Cap (<$25K)")
-            elif market_cap < 50000:
-                risk_score += 1
-                risk_factors.append("Small Market Cap (<$50K)")
-            
-            # Age risk
-            age_minutes = self.get_token_age_minutes(pair)
-            if age_minutes is not None:
-                if age_minutes < 2:
-                    risk_score += 4
-                    risk_factors.append("Extremely New (<2min)")
-                elif age_minutes < 5:
-                    risk_score += 3
-                    risk_factors.append("Very New (<5min)")
-                elif age_minutes < 15:
-                    risk_score += 2
-                    risk_factors.append("New (<15min)")
-                elif age_minutes < 30:
-                    risk_score += 1
-                    risk_factors.append("Recent (<30min)")
-            else:
-                risk_score += 2
-                risk_factors.append("Unknown Age")
-            
-            # Volume risk
-            volume_24h = float(pair.get('volume', {}).get('h24', 0) or 0)
-            if volume_24h < 500:
-                risk_score += 3
-                risk_factors.append("Very Low Volume (<$500)")
-            elif volume_24h < 2000:
-                risk_score += 2
-                risk_factors.append("Low Volume (<$2K)")
-            elif volume_24h < 5000:
-                risk_score += 1
-                risk_factors.append("Moderate Volume (<$5K)")
-            
-            # Liquidity risk
-            liquidity_usd = float(pair.get('liquidity', {}).get('usd', 0) or 0)
-            if liquidity_usd < 2000:
-                risk_score += 3
-                risk_factors.append("Very Low Liquidity (<$2K)")
-            elif liquidity_usd < 5000:
-                risk_score += 2
-                risk_factors.append("Low Liquidity (<$5K)")
-            elif liquidity_usd < 10000:
-                risk_score += 1
-                risk_factors.append("Moderate Liquidity (<$10K)")
-            
-            # Transaction activity risk
-            txns = pair.get('txns', {})
-            total_txns_5m = 0
-            if 'm5' in txns:
-                buys = txns['m5'].get('buys', 0) or 0
-                sells = txns['m5'].get('sells', 0) or 0
-                total_txns_5m = buys + sells
-            
-            if total_txns_5m == 0:
-                risk_score += 3
-                risk_factors.append("No Recent Activity")
-            elif total_txns_5m < 5:
-                risk_score += 2
-                risk_factors.append("Very Low Activity (<5 txns/5m)")
-            elif total_txns_5m < 20:
-                risk_score += 1
-                risk_factors.append("Low Activity (<20 txns/5m)")
-            
-            # DEX trust factor
-            dex_id = pair.get('dexId', '').lower()
-            trusted_dexes = ['raydium', 'orca', 'jupiter']
-            major_dexes = ['pumpfun', 'pump.fun', 'moonshot']
-            
-            if not any(dex in dex_id for dex in trusted_dexes + major_dexes):
-                risk_score += 2
-                risk_factors.append("Unknown/Minor DEX")
-            elif any(dex in dex_id for dex in major_dexes):
-                risk_score += 1
-                risk_factors.append("Major DEX (Non-Traditional)")
-
-            # Social and website info
-            info = pair.get('info', {})
-            websites = info.get('websites', [])
-            socials = info.get('socials', [])
-            if not websites and not socials:
-                risk_score += 2
-                risk_factors.append("No website or social links")
-            
-            # Price stability (if available)
-            price_change_24h = float(pair.get('priceChange', {}).get('h24', 0) or 0)
-            if abs(price_change_24h) > 200:
-                risk_score += 2
-                risk_factors.append("Extreme Volatility (>200%)")
-            elif abs(price_change_24h) > 100:
-                risk_score += 1
-                risk_factors.append("High Volatility (>100%)")
-            
-            # Risk level classification
-            if risk_score <= 2:
-                risk_level = "🟢 LOW"
-            elif risk_score <= 5:
-                risk_level = "🟡 MEDIUM"
-            elif risk_score <= 8:
-                risk_level = "🟠 HIGH"
-            elif risk_score <= 12:
-                risk_level = "🔴 VERY HIGH"
-            else:
-                risk_level = "⚫ EXTREME"
-            
-            return risk_level, risk_factors, risk_score
+            if snap.risk_score is None:
+                self.score_pairs([snap])
+            risk_score = snap.risk_score
+            return self.rule_engine.level(risk_score), self.risk_factors(snap), risk_score
             
         except Exception as e:
             self.safe_log('warning', f"Error calculating risk score: {e}")
             return "⚪ UNKNOWN", ["Analysis Failed"], 10
     
-    def format_enhanced_message(self, pair: Dict) -> Tuple[Optional[str], Optional[Dict]]:
+    def format_enhanced_message(self, snap: PairSnapshot) -> Tuple[Optional[str], Optional[Dict]]:
         """Create comprehensive message with all available data"""
         try:
-            base_token = pair.get('baseToken', {})
-            quote_token = pair.get('quoteToken', {})
+            quote_token = snap.quote_token
             
             # Basic token info
-            token_name = base_token.get('name', 'Unknown Token')
-            symbol = base_token.get('symbol', 'UNK')
-            contract_address = base_token.get('address', 'N/A')
+            token_name = snap.name or 'Unknown Token'
+            symbol = snap.symbol or 'UNK'
+            contract_address = snap.base_address or 'N/A'
             
             # Market data
-            market_cap = float(pair.get('fdv', 0) or pair.get('marketCap', 0) or 0)
-            price_usd = float(pair.get('priceUsd', 0) or 0)
-            price_native = pair.get('priceNative', 'N/A')
+            market_cap = snap.market_cap
+            price_usd = snap.price_usd
+            price_native = snap.price_native
             
             # Volume and liquidity
-            volume = pair.get('volume', {})
-            volume_24h = float(volume.get('h24', 0) or 0)
-            volume_1h = float(volume.get('h1', 0) or 0)
-            volume_5m = float(volume.get('m5', 0) or 0)
+            volume_24h = snap.volume_24h
+            volume_1h = snap.volume_1h
+            volume_5m = snap.volume_5m
             
-            liquidity = pair.get('liquidity', {})
-            liquidity_usd = float(liquidity.get('usd', 0) or 0)
-            liquidity_base = float(liquidity.get('base', 0) or 0)
-            liquidity_quote = float(liquidity.get('quote', 0) or 0)
+            liquidity_usd = snap.liquidity_usd
+            liquidity_base = snap.liquidity_base
+            liquidity_quote = snap.liquidity_quote
             
             # Price changes
-            price_change = pair.get('priceChange', {})
-            price_change_5m = float(price_change.get('m5', 0) or 0)
-            price_change_1h = float(price_change.get('h1', 0) or 0)
-            price_change_24h = float(price_change.get('h24', 0) or 0)
+            price_change_5m = snap.price_change_5m
+            price_change_1h = snap.price_change_1h
+            price_change_24h = snap.price_change_24h
             
             # Transaction data
-            txns = pair.get('txns', {})
+            txns = snap.txns
             
             # DEX and pair info
-            dex_name = pair.get('dexId', 'Unknown DEX').title()
-            pair_address = pair.get('pairAddress', 'N/A')
-            url = pair.get('url', '')
+            dex = classify_dex(snap.dex_id)
+            dex_name = dex.name
+            pair_address = snap.pair_address or 'N/A'
+            url = snap.url
             
             # Age calculation
-            age_minutes = self.get_token_age_minutes(pair)
+            age_minutes = snap.age_minutes
             if age_minutes is not None:
                 if age_minutes < 60:
                     age_str = f"{int(age_minutes)}m"
@@ -816,29 +2630,26 @@ class SolanaCryptoBot:
                 age_str = "Unknown"
             
             # Risk analysis
-            risk_level, risk_factors, risk_score = self.calculate_comprehensive_risk_score(pair)
+            risk_level, risk_factors, risk_score = self.calculate_comprehensive_risk_score(snap)
             
             # Emojis based on data
             change_emoji_24h = self.get_change_emoji(price_change_24h)
             change_emoji_1h = self.get_change_emoji(price_change_1h)
             change_emoji_5m = self.get_change_emoji(price_change_5m)
             
-            dex_emoji = self.get_dex_emoji(dex_name.lower())
+            dex_emoji = dex.emoji
             
             # Transaction details
             txn_details = self.format_transaction_details(txns)
             
             # Social and website info
-            info = pair.get('info', {})
-            websites = info.get('websites', [])
+            websites = snap.websites
             website_url = websites[0].get('url') if websites else None
             
-            socials = info.get('socials', [])
-            social_links = self.format_social_links(socials)
+            social_links = self.format_social_links(snap.socials)
             
             # Boost info
-            boosts = pair.get('boosts', {})
-            active_boosts = boosts.get('active', 0)
+            active_boosts = snap.active_boosts
             
             # Format the comprehensive message
             message = f"""
@@ -961,26 +2772,6 @@ class SolanaCryptoBot:
         else:
             return "💀"
     
-    def get_dex_emoji(self, dex_name: str) -> str:
-        """Get emoji for DEX"""
-        dex_emojis = {
-            'raydium': '🌊',
-            'orca': '🐋',
-            'jupiter': '🪐',
-            'pumpfun': '💎',
-            'pump.fun': '💎',
-            'moonshot': '🌙',
-            'meteora': '☄️',
-            'serum': '🧬',
-            'aldrin': '⚡'
-        }
-        
-        for dex, emoji in dex_emojis.items():
-            if dex in dex_name:
-                return emoji
-        
-        return "🏪"
-    
     def format_transaction_details(self, txns: Dict) -> str:
         """Format transaction details across timeframes"""
         details = []
@@ -1032,98 +2823,186 @@ class SolanaCryptoBot:
         
         return "\n".join(links) if links else ""
     
-    async def send_telegram_message(self, message: str) -> bool:
-        """Enhanced Telegram message sending with error handling"""
-        try:
-            # Split message if too long (Telegram limit is ~4096 characters)
-            if len(message) > 4000:
-                # Split at a reasonable point
-                parts = [message[i:i+4000] for i in range(0, len(message), 4000)]
-                
-                for i, part in enumerate(parts):
-                    await self.bot.send_message(
-                        chat_id=TELEGRAM_CHAT_ID,
-                        text=part,
-                        parse_mode='Markdown',
-                        disable_web_page_preview=True
-                    )
-                    
-                    if i < len(parts) - 1:  # Don't wait after the last part
-                        await asyncio.sleep(1)  # Brief delay between parts
-            else:
-                await self.bot.send_message(
-                    chat_id=TELEGRAM_CHAT_ID,
-                    text=message,
-                    parse_mode='Markdown',
-                    disable_web_page_preview=True
-                )
-            
+    def queue_telegram_message(self, message: str, chat_id=TELEGRAM_CHAT_ID,
+                               priority: int = TelegramOutbox.SYSTEM_PRIORITY) -> asyncio.Future:
+        """Hand a message to the outbox; the returned future resolves to the delivery result"""
+        future = self.outbox.submit(chat_id, message, priority)
+        submitted = time.perf_counter()
+        future.add_done_callback(lambda done: self._count_telegram_delivery(done, submitted))
+        return future
+    
+    def _count_telegram_delivery(self, future: asyncio.Future, submitted: float):
+        delivered = not future.cancelled() and future.result()
+        # Queueing, rate governing and the Bot API call together
+        self.metrics.observe('telegram_delivery_seconds', time.perf_counter() - submitted,
+                             outcome='delivered' if delivered else 'failed')
+        if delivered:
             self.safe_log('info', "[SUCCESS] Message sent to Telegram successfully")
             self.stats['total_notifications_sent'] += 1
-            return True
-            
-        except Exception as e:
-            self.safe_log('error', f"Error sending Telegram message: {e}")
+        else:
             self.stats['errors'] += 1
-            
-            # Try sending a simplified version
-            try:
-                simple_message = "⚠️ Error sending full message. Check logs for details."
-                await self.bot.send_message(
-                    chat_id=TELEGRAM_CHAT_ID,
-                    text=simple_message
-                )
-                return False
-            except:
-                return False
     
-    def send_to_axiom(self, data: Dict) -> bool:
-        """Enhanced Axiom logging with retry logic"""
+    async def send_telegram_message(self, message: str) -> bool:
+        """Send a message through the outbox and wait for delivery"""
+        return await self.queue_telegram_message(message)
+    
+    def send_to_axiom(self, data: Dict):
+        """Queue an alert for batched Axiom ingest"""
+        if not AXIOM_TOKEN or not AXIOM_DATASET:
+            return
+        
+        with self.metrics.timer('axiom_enqueue_seconds'):
+            self.axiom_buffer.add(self.axiom_encoder.encode_line({**data, 'bot_stats': self.stats.copy()}))
+        self.metrics.inc('axiom_events_total', state='queued')
+    
+    async def send_axiom_batch(self, lines: List[bytes]) -> bool:
+        """Ingest a batch of spooled NDJSON lines into Axiom with retry logic"""
         max_retries = 3
+        limiter = self.get_rate_limiter('axiom-ingest')
+        body = self.axiom_encoder.compress(lines)
         
         for attempt in range(max_retries):
+            started = time.perf_counter()
             try:
-                enhanced_data = {
-                    **data,
-                    'bot_stats': self.stats.copy(),
-                    'settings': {
-                        'min_market_cap': MIN_MARKET_CAP,
-                        'max_market_cap': MAX_MARKET_CAP,
-                        'max_age_minutes': MAX_TOKEN_AGE_MINUTES,
-                        'check_interval': CHECK_INTERVAL,
-                        'query_limit': QUERY_LIMIT,
-                        'chain': 'solana'
-                    },
-                    'attempt': attempt + 1
-                }
-                
-                response = requests.post(
-                    f"https://api.axiom.co/v1/datasets/{AXIOM_DATASET}/ingest",
+                await limiter.acquire()
+                response = await self.http_pool.post(
+                    AXIOM_INGEST_URL.format(dataset=AXIOM_DATASET),
                     headers={
                         "Authorization": f"Bearer {AXIOM_TOKEN}",
-                        "Content-Type": "application/json"
+                        **self.axiom_encoder.headers
                     },
-                    json=[enhanced_data],
-                    timeout=15
+                    content=body
                 )
+                limiter.update_from_headers(response.headers, response.status_code)
                 response.raise_for_status()
                 
-                self.safe_log('info', f"[SUCCESS] Data sent to Axiom successfully: {response.status_code}")
+                self.metrics.observe('axiom_ingest_seconds', time.perf_counter() - started, outcome='ok')
+                self.metrics.inc('axiom_events_total', len(lines), state='sent')
+                self.safe_log('info', f"[SUCCESS] Sent {len(lines)} events to Axiom: {response.status_code}")
                 return True
                 
-            except requests.exceptions.RequestException as e:
+            except httpx.HTTPError as e:
+                self.metrics.observe('axiom_ingest_seconds', time.perf_counter() - started, outcome='error')
                 self.safe_log('warning', f"Axiom attempt {attempt + 1} failed: {e}")
                 if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff
+                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
                 else:
-                    self.safe_log('error', f"Failed to send to Axiom after {max_retries} attempts")
+                    self.safe_log('error', f"Failed to send {len(lines)} events to Axiom after {max_retries} attempts, keeping them spooled")
                     self.stats['errors'] += 1
                     return False
     
+    async def filter_stage(self, batches: asyncio.Queue, ranking: RankedPairs, scan_ms: int, scan: Dict):
+        """Pipeline stage 2: dedupe, parse, filter and score each source batch as it arrives"""
+        SCAN_STAGE.set('filter')
+        # Richness of the copy already evaluated this scan, per pair key; a later
+        # source only gets a second look at a pair when it carries more detail
+        evaluated = {}
+        try:
+            while True:
+                batch = await batches.get()
+                if batch is None:
+                    break
+                
+                fresh = []
+                for pair in self.remove_duplicate_pairs(batch):
+                    key = self.pair_key(pair)
+                    richness = self.pair_richness(pair)
+                    if evaluated.get(key, -1) < richness:
+                        evaluated[key] = richness
+                        fresh.append(pair)
+                if not fresh:
+                    continue
+                
+                scan['pairs'] += len(fresh)
+                self.stats['solana_pairs_processed'] += len(fresh)
+                
+                with self.metrics.timer('scan_stage_seconds', stage='normalize'):
+                    snapshots = self.normalize_pairs(fresh, scan_ms)
+                with self.metrics.timer('scan_stage_seconds', stage='filter'):
+                    filtered_pairs = self.filter_pairs_by_criteria(snapshots, scan['rejections'])
+                self.metrics.inc('pairs_evaluated_total', len(snapshots))
+                self.metrics.inc('pairs_passed_total', len(filtered_pairs))
+                scan['passed'] += len(filtered_pairs)
+                if not filtered_pairs:
+                    continue
+                
+                with self.metrics.timer('scan_stage_seconds', stage='score'):
+                    self.score_pairs(filtered_pairs)
+                with self.metrics.timer('scan_stage_seconds', stage='route'):
+                    routes = self.subscriptions.match_batch(filtered_pairs)
+                for snap, chat_ids in zip(filtered_pairs, routes):
+                    if not chat_ids:
+                        self.safe_log('debug', "No subscriber window matches %s", snap.symbol or 'UNKNOWN')
+                        continue
+                    snap.chat_ids = chat_ids
+                    deferred = ranking.push(snap)
+                    if deferred is not None:
+                        self.safe_log('debug', "Deferred %s to a later scan (risk %s)", deferred.symbol or 'UNKNOWN', deferred.risk_score)
+        finally:
+            ranking.close()
+    
+    async def notify_stage(self, ranking: RankedPairs, scan: Dict):
+        """Pipeline stage 3: render the best waiting pair whenever the outbox is free for it"""
+        SCAN_STAGE.set('notify')
+        pacing = None
+        while True:
+            # Pulling only after the previous alert went out lets better
+            # candidates from slower sources overtake the early arrivals
+            if pacing:
+                await asyncio.wait(pacing, return_when=asyncio.FIRST_COMPLETED)
+            pair = await ranking.pop()
+            if pair is None:
+                break
+            
+            self.safe_log('info', f"[SEND] Processing pair {scan['queued'] + 1}/{QUERY_LIMIT} ({pair.symbol or 'UNKNOWN'}, risk {pair.risk_score})...")
+            
+            with self.metrics.timer('scan_stage_seconds', stage='render'):
+                message, axiom_data = self.format_enhanced_message(pair)
+            if not (message and axiom_data):
+                self.safe_log('error', f"Failed to format message for {pair.symbol or 'UNKNOWN'}, deferring it")
+                ranking.defer()
+                pacing = None
+                continue
+            
+            # The rendered message is shared by every matching chat; a subscriber that
+            # cannot keep up skips alerts instead of growing an unbounded lane
+            deliveries = {}
+            for chat_id in pair.chat_ids:
+                if str(chat_id) != str(TELEGRAM_CHAT_ID) and self.outbox.backlog(chat_id) >= TELEGRAM_CHAT_BACKLOG:
+                    self.metrics.inc('alerts_skipped_total', reason='backlog')
+                    continue
+                deliveries[str(chat_id)] = self.queue_telegram_message(message, chat_id=chat_id, priority=pair.risk_score or 0)
+            if not deliveries:
+                self.safe_log('info', f"Every chat for {pair.symbol or 'UNKNOWN'} is backlogged, deferring it")
+                ranking.defer()
+                pacing = None
+                continue
+            
+            # Only a pair that actually went out to someone counts as processed
+            self.processed_pairs.add(pair.pair_id, pair.age_minutes, self.rule_engine.max_age_minutes)
+            scan['queued'] += 1
+            delivery = asyncio.gather(*deliveries.values())
+            delivery.add_done_callback(lambda future, data=axiom_data: self._log_delivered_alert(future, data))
+            # Pace on the configured chat (or the quickest recipient when it is not one),
+            # so a slow subscriber never holds back alerts to everyone else
+            primary = deliveries.get(str(TELEGRAM_CHAT_ID))
+            pacing = [primary] if primary is not None else list(deliveries.values())
+    
+    def _log_delivered_alert(self, future: asyncio.Future, axiom_data: Dict):
+        if future.cancelled() or not any(future.result()):
+            self.safe_log('error', f"Failed to send notification for {axiom_data.get('symbol', 'UNKNOWN')}")
+            return
+        # Queue for batched Axiom logging
+        self.send_to_axiom(axiom_data)
+    
     async def check_new_pairs(self):
         """Enhanced main scanning function"""
-        start_time = datetime.now(timezone.utc)
+        # One clock reading per scan; every pair's age is measured against it
+        scan_ms = now_ms()
+        start_time = datetime.fromtimestamp(scan_ms / 1000, tz=timezone.utc)
         self.stats['last_check'] = start_time.isoformat()
+        # Tag every log line of this scan (including its stage tasks) with one id
+        scan_id_token = SCAN_ID.set(f"{scan_ms:x}")
         
         self.safe_log('info', "=" * 60)
         self.safe_log('info', "[SEARCH] Starting enhanced Solana crypto pair scan...")
@@ -1131,68 +3010,67 @@ class SolanaCryptoBot:
         self.safe_log('info', "=" * 60)
         
         try:
-            # Fetch pairs from multiple sources
-            pairs = await asyncio.to_thread(self.fetch_solana_pairs)
+            # fetch -> filter -> notify, connected by bounded queues so each source's
+            # pairs are filtered and alerted on while slower sources are still loading
+            batches = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+            ranking = RankedPairs(QUERY_LIMIT)
+            self.active_pipeline = (batches, ranking)
+            scan = {'pairs': 0, 'passed': 0, 'queued': 0, 'rejections': {}}
+            
+            stages = [
+                asyncio.create_task(self.fetch_stage(batches)),
+                asyncio.create_task(self.filter_stage(batches, ranking, scan_ms, scan)),
+                asyncio.create_task(self.notify_stage(ranking, scan))
+            ]
+            try:
+                await asyncio.gather(*stages)
+            finally:
+                for stage in stages:
+                    stage.cancel()
             
-            if not pairs:
+            if not scan['pairs']:
                 self.safe_log('warning', "No pairs data received from any source")
-                return
-            
-            self.safe_log('info', f"[STATS] Processing {len(pairs)} total Solana pairs...")
-            
-            # Apply comprehensive filtering
-            filtered_pairs = self.filter_pairs_by_criteria(pairs)
-            
-            if filtered_pairs:
-                # Limit the number of notifications per cycle
-                limited_pairs = filtered_pairs[:QUERY_LIMIT]
-                
-                self.safe_log('info', f"[TARGET] Found {len(filtered_pairs)} promising pairs, processing {len(limited_pairs)}")
-                
-                successful_notifications = 0
-                
-                for i, pair in enumerate(limited_pairs, 1):
-                    self.safe_log('info', f"[SEND] Processing pair {i}/{len(limited_pairs)}...")
-                    
-                    message, axiom_data = self.format_enhanced_message(pair)
-                    
-                    if message and axiom_data:
-                        # Send Telegram notification
-                        telegram_success = await self.send_telegram_message(message)
-                        
-                        if telegram_success:
-                            successful_notifications += 1
-                            
-                            # Send to Axiom for logging
-                            await asyncio.to_thread(self.send_to_axiom, axiom_data)
-                            
-                            # Rate limiting between messages
-                            if i < len(limited_pairs):
-                                await asyncio.sleep(5)  # 5 second delay between messages
-                        else:
-                            self.safe_log('error', f"Failed to send notification for pair {i}")
-                    else:
-                        self.safe_log('error', f"Failed to format message for pair {i}")
-                
-                self.safe_log('info', f"[SUCCESS] Successfully sent {successful_notifications}/{len(limited_pairs)} notifications")
-                
+            elif scan['queued']:
+                deferred = ranking.evicted + len(ranking)
+                self.safe_log('info', f"[TARGET] Found {scan['passed']} promising pairs, processed {scan['queued']}, deferred {deferred} to the next scan")
+                self.safe_log('info', f"[SUCCESS] Queued {scan['queued']} notifications ({self.outbox.pending} waiting in outbox)")
             else:
                 self.safe_log('info', "[SEARCH] No pairs met the filtering criteria this round")
             
             # Log comprehensive scan statistics
             scan_duration = (datetime.now(timezone.utc) - start_time).total_seconds()
+            self.metrics.observe('scan_duration_seconds', scan_duration)
+            self.metrics.set_gauge('last_scan_timestamp_seconds', scan_ms / 1000)
             
             self.safe_log('info', "=" * 60)
             self.safe_log('info', "[STATS] SCAN SUMMARY")
             self.safe_log('info', f"Duration: {scan_duration:.2f} seconds")
             self.safe_log('info', f"[REFRESH] API Calls Made: {self.stats['api_calls_made']}")
-            self.safe_log('info', f"[STATS] Total Pairs Processed: {len(pairs)}")
-            self.safe_log('info', f"[SUCCESS] Pairs Passed Filters: {len(filtered_pairs) if 'filtered_pairs' in locals() else 0}")
+            self.safe_log('info', f"[STATS] Total Pairs Processed: {scan['pairs']}")
+            self.safe_log('info', f"[SUCCESS] Pairs Passed Filters: {scan['passed']}")
             self.safe_log('info', f"[SEND] Notifications Sent: {self.stats['total_notifications_sent']}")
             self.safe_log('info', f"[ERROR] Errors: {self.stats['errors']}")
             self.safe_log('info', f"[CACHE] Processed Pairs Cache Size: {len(self.processed_pairs)}")
+            pool_stats = self.http_pool.get_stats()
+            self.safe_log('info', f"[LINK] HTTP Pool: {pool_stats['requests']} requests, {pool_stats['new_connections']} new connections, reuse {pool_stats['reuse_ratio']:.0%}")
+            if scan['rejections']:
+                self.safe_log('info', "Rejection statistics:")
+                for reason, count in sorted(scan['rejections'].items(), key=lambda x: x[1], reverse=True):
+                    self.safe_log('info', f"   - {reason}: {count}")
             self.safe_log('info', "=" * 60)
             
+            # Aggregated counters are always kept, whatever is sampled away above
+            counters = {
+                'duration_s': round(scan_duration, 3),
+                'pairs': scan['pairs'],
+                'passed': scan['passed'],
+                'notified': scan['queued'],
+                'deferred': ranking.evicted + len(ranking),
+                'rejected': {reason_category(reason): count for reason, count in scan['rejections'].items()}
+            }
+            logger.info("[STATS] Scan counters: %s", json.dumps(counters, separators=(',', ':')),
+                        extra={'event': 'scan_summary', 'counters': counters})
+            
         except Exception as e:
             self.safe_log('error', f"Critical error in check_new_pairs: {e}")
             self.stats['errors'] += 1
@@ -1203,6 +3081,9 @@ class SolanaCryptoBot:
                 await self.send_telegram_message(error_message)
             except:
                 self.safe_log('error', "Failed to send error notification")
+        finally:
+            self.active_pipeline = None
+            SCAN_ID.reset(scan_id_token)
 
 # Command Handlers
 async def start_command(update, context: ContextTypes.DEFAULT_TYPE):
@@ -1223,6 +3104,7 @@ async def start_command(update, context: ContextTypes.DEFAULT_TYPE):
 • Comprehensive filtering
 • Real-time notifications
 • Detailed analytics
+• Per-chat alert windows (/subscribe, /unsubscribe)
 
 🔗 **Supported DEXes:**
 • Raydium • Orca • Jupiter
@@ -1275,6 +3157,82 @@ async def health_command(update, context: ContextTypes.DEFAULT_TYPE):
     """
     await update.message.reply_text(health_message, parse_mode='Markdown')
 
+async def metrics_command(update, context: ContextTypes.DEFAULT_TYPE):
+    """Show p50/p95/p99 latencies per endpoint, stage and outcome"""
+    crypto_bot = context.bot_data.get('crypto_bot')
+    if crypto_bot is None:
+        await update.message.reply_text("Bot metrics not available.")
+        return
+    
+    lines = []
+    for name, labels, count, (p50, p95, p99) in crypto_bot.metrics.latency_summary():
+        label_text = ','.join(f"{key}={value}" for key, value in labels.items())
+        lines.append(f"{name}{{{label_text}}} n={count} p50={p50 * 1000:.0f}ms p95={p95 * 1000:.0f}ms p99={p99 * 1000:.0f}ms")
+    
+    text = "\n".join(lines) or "No latency samples yet."
+    await update.message.reply_text(f"📈 **LATENCY (p50/p95/p99)**\n```\n{text[:3800]}\n```", parse_mode='Markdown')
+
+def can_manage_subscriptions(update) -> bool:
+    """Only allowlisted users may change who receives alerts"""
+    user = update.effective_user
+    return user is not None and str(user.id) in SUBSCRIPTION_ADMIN_IDS
+
+async def subscribe_command(update, context: ContextTypes.DEFAULT_TYPE):
+    """Subscribe this chat: /subscribe [min_mc max_mc [max_age_minutes]]"""
+    crypto_bot = context.bot_data.get('crypto_bot')
+    if crypto_bot is None:
+        await update.message.reply_text("Bot is not ready yet.")
+        return
+    if not can_manage_subscriptions(update):
+        await update.message.reply_text("⛔ You are not allowed to manage alert subscriptions.")
+        return
+    
+    try:
+        args = [float(arg.replace(',', '').lstrip('$')) for arg in context.args or []]
+        if len(args) not in (0, 2, 3) or not all(math.isfinite(arg) for arg in args):
+            raise ValueError
+        min_mc, max_mc = args[:2] if args else (MIN_MARKET_CAP, MAX_MARKET_CAP)
+        max_age = args[2] if len(args) == 3 else MAX_TOKEN_AGE_MINUTES
+        if min_mc > max_mc or max_age < 0:
+            raise ValueError
+    except ValueError:
+        await update.message.reply_text("Usage: /subscribe [min_mc max_mc [max_age_minutes]]")
+        return
+    
+    chat_id = str(update.effective_chat.id)
+    if chat_id not in crypto_bot.subscriptions.subscriptions and len(crypto_bot.subscriptions) >= MAX_SUBSCRIPTIONS:
+        await update.message.reply_text(f"Subscriber limit reached ({MAX_SUBSCRIPTIONS} chats).")
+        return
+    
+    subscription = Subscription(update.effective_chat.id, min_mc, max_mc, 0, max_age)
+    crypto_bot.subscriptions.add(subscription)
+    await asyncio.to_thread(crypto_bot.state_store.save_subscription, subscription)
+    
+    await update.message.reply_text(
+        f"✅ Subscribed: MC ${min_mc:,.0f}-${max_mc:,.0f}, age up to {max_age:g} minutes.\n"
+        f"Pairs must also pass the global filters (MC ${MIN_MARKET_CAP:,}-${MAX_MARKET_CAP:,}, age up to {MAX_TOKEN_AGE_MINUTES} minutes)."
+    )
+
+async def unsubscribe_command(update, context: ContextTypes.DEFAULT_TYPE):
+    """Stop alerts for this chat"""
+    crypto_bot = context.bot_data.get('crypto_bot')
+    if crypto_bot is None:
+        await update.message.reply_text("Bot is not ready yet.")
+        return
+    if not can_manage_subscriptions(update):
+        await update.message.reply_text("⛔ You are not allowed to manage alert subscriptions.")
+        return
+    
+    chat_id = str(update.effective_chat.id)
+    await asyncio.to_thread(crypto_bot.state_store.delete_subscription, chat_id)
+    if chat_id == str(TELEGRAM_CHAT_ID):
+        crypto_bot.subscriptions.add(Subscription(chat_id))
+        await update.message.reply_text("This is the configured alert chat; its window was reset to the defaults.")
+    elif crypto_bot.subscriptions.remove(chat_id):
+        await update.message.reply_text("🔕 Unsubscribed from alerts.")
+    else:
+        await update.message.reply_text("This chat was not subscribed.")
+
 # Main execution
 async def main():
     """Main function with enhanced error handling"""
@@ -1302,11 +3260,15 @@ async def main():
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CommandHandler("stats", stats_command))
     application.add_handler(CommandHandler("health", health_command))
+    application.add_handler(CommandHandler("metrics", metrics_command))
+    application.add_handler(CommandHandler("subscribe", subscribe_command))
+    application.add_handler(CommandHandler("unsubscribe", unsubscribe_command))
     
     try:
         # Start the application
         await application.initialize()
         await application.start()
+        await crypto_bot.start()
         
         logger.info("[SUCCESS] Telegram bot started")
         logger.info(f"[TARGET] Monitoring Solana pairs every {CHECK_INTERVAL} seconds")
@@ -1332,6 +3294,7 @@ async def main():
         while True:
             try:
                 await crypto_bot.check_new_pairs()
+                await crypto_bot.save_state()
                 
                 # Wait for next check
                 logger.info(f"[SLEEP] Sleeping for {CHECK_INTERVAL} seconds...")
@@ -1349,6 +3312,7 @@ async def main():
         raise
     finally:
         logger.info("[STOP] Shutting down bot...")
+        await crypto_bot.close()
         try:
             await application.stop()
             await application.shutdown()
@@ -0,0 +1,221 @@
+"""Frozen copy of the original per-pair filter and risk logic, used as the equivalence oracle.
+
+Two deliberate deviations from the original code:
+- ages are measured against a fixed scan clock instead of datetime.now(), so the
+  oracle and the bot see the same age for a pair;
+- address validation delegates to Bot.is_solana_pubkey, which replaced the
+  loose length/charset check on purpose.
+"""
+from typing import Dict, Optional, Tuple
+
+import Bot
+
+SOLANA_DEXES = ['raydium', 'orca', 'serum', 'jupiter', 'moonshot', 'pumpfun', 'pump.fun', 'bonkswap', 'aldrin', 'meteora']
+
+
+def is_solana_pair(pair: Dict) -> bool:
+    try:
+        chain_id = str(pair.get('chainId', '')).lower()
+        if chain_id == 'solana':
+            return True
+        dex_id = str(pair.get('dexId', '')).lower()
+        if any(dex in dex_id for dex in SOLANA_DEXES):
+            return True
+        base_addr = pair.get('baseToken', {}).get('address', '')
+        quote_addr = pair.get('quoteToken', {}).get('address', '')
+        return Bot.is_solana_pubkey(base_addr) or Bot.is_solana_pubkey(quote_addr)
+    except Exception:
+        return False
+
+
+def get_token_age_minutes(pair: Dict, scan_ms: int) -> Optional[float]:
+    try:
+        pair_created_at = pair.get('pairCreatedAt', 0)
+        if not pair_created_at:
+            return None
+        return (scan_ms - pair_created_at) / 60000
+    except Exception:
+        return None
+
+
+def is_pair_promising(pair: Dict, scan_ms: int) -> Tuple[bool, str]:
+    """Returns (passed, reason category) the way the original filter reported it"""
+    try:
+        base_token = pair.get('baseToken', {})
+        if not base_token or not base_token.get('address'):
+            return False, "Missing base token data"
+
+        if not is_solana_pair(pair):
+            return False, "Not a Solana pair"
+
+        market_cap = 0
+        fdv = pair.get('fdv') or pair.get('marketCap')
+        if fdv:
+            try:
+                market_cap = float(fdv)
+            except (ValueError, TypeError):
+                market_cap = 0
+
+        if market_cap == 0:
+            try:
+                price_usd = float(pair.get('priceUsd', 0) or 0)
+                if price_usd <= 0:
+                    return False, "No market cap or price data"
+            except Exception:
+                return False, "Invalid price data"
+
+        if market_cap > 0 and not (Bot.MIN_MARKET_CAP <= market_cap <= Bot.MAX_MARKET_CAP):
+            return False, "Market cap outside range"
+
+        age_minutes = get_token_age_minutes(pair, scan_ms)
+        if age_minutes is not None:
+            if age_minutes > Bot.MAX_TOKEN_AGE_MINUTES:
+                return False, "Too old"
+            if age_minutes < 0:
+                return False, "Invalid timestamp"
+
+        try:
+            volume_24h = float(pair.get('volume', {}).get('h24', 0) or 0)
+        except Exception:
+            volume_24h = 0
+        if volume_24h < 100:
+            return False, "Low volume"
+
+        try:
+            price_usd = float(pair.get('priceUsd', 0) or 0)
+            if price_usd <= 0:
+                return False, "No valid price data"
+        except Exception:
+            return False, "Invalid price format"
+
+        try:
+            liquidity_usd = float(pair.get('liquidity', {}).get('usd', 0) or 0)
+            if liquidity_usd < 1000:
+                return False, "Low liquidity"
+        except Exception:
+            pass
+
+        try:
+            txns = pair.get('txns', {})
+            txns_5m = 0
+            if 'm5' in txns:
+                txns_5m = (txns['m5'].get('buys', 0) or 0) + (txns['m5'].get('sells', 0) or 0)
+            if txns_5m == 0 and 'h1' in txns:
+                if (txns['h1'].get('buys', 0) or 0) + (txns['h1'].get('sells', 0) or 0) < 5:
+                    return False, "Very low activity"
+        except Exception:
+            pass
+
+        return True, "All checks passed"
+    except Exception as e:
+        return False, f"Filter error: {e}"
+
+
+def calculate_comprehensive_risk_score(pair: Dict, scan_ms: int) -> Tuple[str, list, int]:
+    risk_score = 0
+    risk_factors = []
+
+    try:
+        market_cap = float(pair.get('fdv', 0) or pair.get('marketCap', 0) or 0)
+        if market_cap < 10000:
+            risk_score += 3
+            risk_factors.append("Very Low Market Cap (<$10K)")
+        elif market_cap < 25000:
+            risk_score += 2
+            risk_factors.append("Low Market Cap (<$25K)")
+        elif market_cap < 50000:
+            risk_score += 1
+            risk_factors.append("Small Market Cap (<$50K)")
+
+        age_minutes = get_token_age_minutes(pair, scan_ms)
+        if age_minutes is not None:
+            if age_minutes < 2:
+                risk_score += 4
+                risk_factors.append("Extremely New (<2min)")
+            elif age_minutes < 5:
+                risk_score += 3
+                risk_factors.append("Very New (<5min)")
+            elif age_minutes < 15:
+                risk_score += 2
+                risk_factors.append("New (<15min)")
+            elif age_minutes < 30:
+                risk_score += 1
+                risk_factors.append("Recent (<30min)")
+        else:
+            risk_score += 2
+            risk_factors.append("Unknown Age")
+
+        volume_24h = float(pair.get('volume', {}).get('h24', 0) or 0)
+        if volume_24h < 500:
+            risk_score += 3
+            risk_factors.append("Very Low Volume (<$500)")
+        elif volume_24h < 2000:
+            risk_score += 2
+            risk_factors.append("Low Volume (<$2K)")
+        elif volume_24h < 5000:
+            risk_score += 1
+            risk_factors.append("Moderate Volume (<$5K)")
+
+        liquidity_usd = float(pair.get('liquidity', {}).get('usd', 0) or 0)
+        if liquidity_usd < 2000:
+            risk_score += 3
+            risk_factors.append("Very Low Liquidity (<$2K)")
+        elif liquidity_usd < 5000:
+            risk_score += 2
+            risk_factors.append("Low Liquidity (<$5K)")
+        elif liquidity_usd < 10000:
+            risk_score += 1
+            risk_factors.append("Moderate Liquidity (<$10K)")
+
+        txns = pair.get('txns', {})
+        total_txns_5m = 0
+        if 'm5' in txns:
+            total_txns_5m = (txns['m5'].get('buys', 0) or 0) + (txns['m5'].get('sells', 0) or 0)
+        if total_txns_5m == 0:
+            risk_score += 3
+            risk_factors.append("No Recent Activity")
+        elif total_txns_5m < 5:
+            risk_score += 2
+            risk_factors.append("Very Low Activity (<5 txns/5m)")
+        elif total_txns_5m < 20:
+            risk_score += 1
+            risk_factors.append("Low Activity (<20 txns/5m)")
+
+        dex_id = pair.get('dexId', '').lower()
+        trusted_dexes = ['raydium', 'orca', 'jupiter']
+        major_dexes = ['pumpfun', 'pump.fun', 'moonshot']
+        if not any(dex in dex_id for dex in trusted_dexes + major_dexes):
+            risk_score += 2
+            risk_factors.append("Unknown/Minor DEX")
+        elif any(dex in dex_id for dex in major_dexes):
+            risk_score += 1
+            risk_factors.append("Major DEX (Non-Traditional)")
+
+        info = pair.get('info', {})
+        if not info.get('websites', []) and not info.get('socials', []):
+            risk_score += 2
+            risk_factors.append("No website or social links")
+
+        price_change_24h = float(pair.get('priceChange', {}).get('h24', 0) or 0)
+        if abs(price_change_24h) > 200:
+            risk_score += 2
+            risk_factors.append("Extreme Volatility (>200%)")
+        elif abs(price_change_24h) > 100:
+            risk_score += 1
+            risk_factors.append("High Volatility (>100%)")
+
+        if risk_score <= 2:
+            risk_level = "🟢 LOW"
+        elif risk_score <= 5:
+            risk_level = "🟡 MEDIUM"
+        elif risk_score <= 8:
+            risk_level = "🟠 HIGH"
+        elif risk_score <= 12:
+            risk_level = "🔴 VERY HIGH"
+        else:
+            risk_level = "⚫ EXTREME"
+
+        return risk_level, risk_factors, risk_score
+
+    except Exception:
+        return "⚪ UNKNOWN", ["Analysis Failed"], 10
@@ -0,0 +1,61 @@
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pytest
+
+# Bot.py reads its configuration at import time; keep logs, state and the spool out of the tree
+WORK_DIR = tempfile.mkdtemp(prefix='solana_bot_tests_')
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', '123456:test-token')
+os.environ['TELEGRAM_CHAT_ID'] = '1000'
+os.environ['LOG_FILE'] = os.path.join(WORK_DIR, 'solana_bot.log')
+os.environ['STATE_DB_PATH'] = os.path.join(WORK_DIR, 'solana_bot_state.db')
+os.environ['AXIOM_SPOOL_DIR'] = os.path.join(WORK_DIR, 'axiom_spool')
+os.environ['RULES_FILE'] = os.path.join(WORK_DIR, 'filter_rules.json')
+os.environ['METRICS_PORT'] = '0'
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Call.py'))
+
+
+@pytest.fixture
+def crypto_bot():
+    import Bot
+    bot = Bot.SolanaCryptoBot()
+    yield bot
+    asyncio.run(bot.close())
+    os.remove(os.environ['STATE_DB_PATH'])
+
+
+SOL = 'So11111111111111111111111111111111111111112'
+
+
+@pytest.fixture
+def make_pair():
+    """Factory for a DexScreener-style pair that passes the default filters"""
+    def build(index=1, scan_ms=None, **overrides):
+        scan_ms = int(time.time() * 1000) if scan_ms is None else scan_ms
+        pair = {
+            'chainId': 'solana',
+            'dexId': 'raydium',
+            'pairAddress': f'P{index}',
+            'baseToken': {'address': f'B{index}', 'symbol': f'S{index}', 'name': 'Token'},
+            'quoteToken': {'address': SOL, 'symbol': 'SOL'},
+            'fdv': 20000,
+            'priceUsd': '0.001',
+            'volume': {'h24': 5000},
+            'liquidity': {'usd': 8000},
+            'txns': {'m5': {'buys': 3, 'sells': 2}},
+            'pairCreatedAt': scan_ms - 5 * 60000,
+        }
+        if 'address' in overrides:
+            pair['baseToken']['address'] = overrides.pop('address')
+        pair.update(overrides)
+        return pair
+    return build
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
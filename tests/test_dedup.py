@@ -0,0 +1,32 @@
+import json
+
+SOL = 'So11111111111111111111111111111111111111112'
+
+
+def test_pair_key_interns_string_addresses(crypto_bot, make_pair):
+    # Decoded JSON strings are fresh objects, as they are for API responses
+    address = '7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU'
+    first_pair, second_pair = json.loads(json.dumps([make_pair(address=address), make_pair(address=address)]))
+    assert first_pair['baseToken']['address'] is not second_pair['baseToken']['address']
+
+    first = crypto_bot.pair_key(first_pair)
+    second = crypto_bot.pair_key(second_pair)
+    assert first == second
+    assert all(a is b for a, b in zip(first, second))
+
+
+def test_non_string_addresses_do_not_break_dedup(crypto_bot, make_pair):
+    # Axiom rows echo back whatever the bot logged, e.g. floats or dicts
+    pairs = [
+        make_pair(address=12345.6),
+        make_pair(address=12345.6),
+        make_pair(address={'address': SOL}, pairAddress=None),
+        make_pair(address=None, pairAddress=42),
+    ]
+    unique = crypto_bot.remove_duplicate_pairs(pairs)
+    assert len(unique) == 3
+    assert crypto_bot.pair_key(pairs[0]) == ('P1', '12345.6', SOL)
+    assert crypto_bot.pair_key(pairs[3]) == ('42', '', SOL)
+
+    snapshots = crypto_bot.normalize_pairs(unique)
+    crypto_bot.filter_pairs_by_criteria(snapshots)
@@ -0,0 +1,125 @@
+"""Randomized equivalence checks between the compiled rule program and the original per-pair logic"""
+import random
+from collections import Counter
+
+import pytest
+
+import baseline_reference as reference
+
+SCAN_MS = 1_750_000_000_000
+SAMPLES = 5000
+ADDRESSES = [
+    'So11111111111111111111111111111111111111112',
+    '7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU',
+    '0xdeadbeefdeadbeefdeadbeefdeadbeefdeadbeef',
+    'abc',
+    '',
+]
+
+
+def random_pair(rng: random.Random) -> dict:
+    pick = rng.choice
+    pair = {
+        'chainId': pick(['solana', 'ethereum', 'bsc', None]),
+        'dexId': pick(['raydium', 'orca', 'pumpfun', 'pump.fun', 'meteora', 'uniswap', 'x', None]),
+        'pairAddress': f"P{rng.randrange(10 ** 9)}",
+        'quoteToken': {'address': pick(ADDRESSES), 'symbol': 'SOL'},
+    }
+    if rng.random() < 0.95:
+        pair['baseToken'] = pick([{'address': pick(ADDRESSES), 'symbol': pick(['X', None, 'SYM']), 'name': 'N'}, {}, None])
+    for key in ('fdv', 'marketCap'):
+        if rng.random() < 0.7:
+            pair[key] = pick([0, None, 'abc', -5, 1000, 5000, 20000, 49999, 50000, 50001, '25000', 1e6])
+    if rng.random() < 0.9:
+        pair['priceUsd'] = pick(['0.001', '0', None, 'x', 0.5, -1])
+    if rng.random() < 0.9:
+        pair['volume'] = pick([{'h24': pick([0, 50, 99, 100, 150, 600, 3000, 6000, '200', None])}, {}])
+    if rng.random() < 0.9:
+        pair['liquidity'] = pick([{'usd': pick([0, 500, 999, 1000, 1500, 3000, 7000, 20000, None, 'x'])}, {}, None, 'bad'])
+    if rng.random() < 0.9:
+        pair['txns'] = pick([
+            {},
+            {'m5': {'buys': pick([0, 1, 3, None, 10, 30]), 'sells': pick([0, 1, None, 12])}},
+            {'m5': {'buys': 0, 'sells': 0}, 'h1': {'buys': pick([0, 2, 4]), 'sells': pick([0, 1, 3])}},
+            {'h1': {'buys': 1, 'sells': 1}},
+        ])
+    if rng.random() < 0.9:
+        minutes = pick([0.5, 1.5, 4, 10, 20, 29.9, 30, 31, 60, -1])
+        pair['pairCreatedAt'] = pick([0, None, SCAN_MS - int(minutes * 60000)])
+    if rng.random() < 0.5:
+        pair['info'] = pick([{}, {'websites': [{'url': 'u'}]}, {'socials': [{'platform': 'twitter', 'handle': 'h'}]}])
+    if rng.random() < 0.5:
+        pair['priceChange'] = {'h24': pick([0, 50, 100, 150, 200, 250, -300, None])}
+    if rng.random() < 0.5:
+        # Near-valid pairs: most fields pass, so single failures and passes are well covered
+        valid = {
+            'chainId': 'solana',
+            'baseToken': {'address': ADDRESSES[1], 'symbol': 'SYM', 'name': 'N'},
+            'fdv': pick([5000, 20000, 49999, 50000]),
+            'priceUsd': pick(['0.001', 0.5]),
+            'volume': {'h24': pick([100, 600, 3000, 6000])},
+            'liquidity': {'usd': pick([1000, 3000, 7000, 20000])},
+            'txns': {'m5': {'buys': pick([1, 3, 10, 30]), 'sells': pick([0, 1, 12])}},
+            'pairCreatedAt': SCAN_MS - int(pick([0.5, 1.5, 4, 10, 20, 29.9]) * 60000),
+        }
+        for key, value in valid.items():
+            if rng.random() < 0.85:
+                pair[key] = value
+    return pair
+
+
+@pytest.fixture
+def random_pairs():
+    rng = random.Random(20240611)
+    return [random_pair(rng) for _ in range(SAMPLES)]
+
+
+def test_filter_matches_original_logic(crypto_bot, random_pairs):
+    snapshots = crypto_bot.normalize_pairs(random_pairs, SCAN_MS)
+    passed = {id(snap.raw) for snap in crypto_bot.filter_pairs_by_criteria(snapshots)}
+
+    expected = {id(pair) for pair in random_pairs if reference.is_pair_promising(pair, SCAN_MS)[0]}
+    assert expected
+    assert passed == expected
+
+
+# The original raised and reported these when a price failed to parse; snapshots read it as 0
+REASON_ALIASES = {
+    "Invalid price data": "No market cap or price data",
+    "Invalid price format": "No valid price data",
+}
+
+
+def test_rejection_reasons_follow_declared_order(crypto_bot, random_pairs):
+    expected = Counter()
+    for pair in random_pairs:
+        promising, reason = reference.is_pair_promising(pair, SCAN_MS)
+        if not promising:
+            expected[REASON_ALIASES.get(reason, reason)] += 1
+
+    # Whatever order measured selectivity runs the rules in, each pair keeps its reason
+    rng = random.Random(7)
+    for _ in range(5):
+        for rule in crypto_bot.rule_engine.filters:
+            rule['rejection_rate'] = rng.random()
+        snapshots = crypto_bot.normalize_pairs(random_pairs, SCAN_MS)
+        rejections = {}
+        crypto_bot.filter_pairs_by_criteria(snapshots, rejections)
+        assert rejections == dict(expected)
+
+
+def test_risk_scores_match_original_logic(crypto_bot, random_pairs):
+    snapshots = crypto_bot.normalize_pairs(random_pairs, SCAN_MS)
+    assert len(snapshots) == len(random_pairs)
+    batch_scores = crypto_bot.score_pairs(snapshots)
+
+    compared = 0
+    for pair, snap, batch_score in zip(random_pairs, snapshots, batch_scores.tolist()):
+        expected = reference.calculate_comprehensive_risk_score(pair, SCAN_MS)
+        if expected[0] == "⚪ UNKNOWN":
+            # The original gave up on malformed fields; the snapshot parser coerces them instead
+            continue
+        compared += 1
+        assert batch_score == expected[2]
+        assert crypto_bot.calculate_comprehensive_risk_score(snap) == expected
+    assert compared > SAMPLES // 2
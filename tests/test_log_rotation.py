@@ -0,0 +1,50 @@
+import gzip
+import logging
+import os
+import shutil
+import time
+
+import Bot
+
+
+def emit_lines(handler, start, count):
+    for seq in range(start, start + count):
+        record = logging.LogRecord('test', logging.INFO, __file__, 0, f"line {seq:06d} " + 'x' * 80, None, None)
+        handler.handle(record)
+
+
+def line_numbers(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return [int(line.split()[1]) for line in f if line.startswith('line ')]
+
+
+def test_retention_keeps_newest_rotations(tmp_path, capfd, monkeypatch):
+    # Slow compression down so rotations outpace it, as in a burst
+    copyfileobj = shutil.copyfileobj
+
+    def slow_copyfileobj(src, dst):
+        time.sleep(0.01)
+        copyfileobj(src, dst)
+
+    monkeypatch.setattr(Bot.shutil, 'copyfileobj', slow_copyfileobj)
+    log_path = str(tmp_path / 'bot.log')
+    # Leftovers from an earlier run that never got compressed
+    for stamp in ('20200101-000000', '20200101-000001'):
+        with open(f"{log_path}.{stamp}", 'w', encoding='utf-8') as f:
+            f.write("line 000000 old\n")
+
+    handler = Bot.CompressingRotatingFileHandler(log_path, max_bytes=2000, interval=0, backup_count=3)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    emit_lines(handler, 1, 200)
+    handler.close()
+    assert capfd.readouterr().err == ''
+
+    rotated = sorted(name for name in os.listdir(tmp_path) if name != 'bot.log')
+    assert len(rotated) == 3
+    assert all(name.endswith('.gz') for name in rotated)
+
+    # The survivors are the three most recent rotations, contiguous with the live file
+    kept = sorted(n for name in rotated for n in line_numbers(str(tmp_path / name)))
+    live = line_numbers(log_path)
+    assert kept + live == list(range(kept[0], 201))
@@ -0,0 +1,40 @@
+import copy
+import json
+import os
+
+import Bot
+
+
+def write_rules(path, config, mtime):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+    os.utime(path, (mtime, mtime))
+
+
+def filter_names(engine):
+    return [rule['name'] for rule in engine.filters]
+
+
+def test_risk_only_file_keeps_default_filters(tmp_path):
+    path = str(tmp_path / 'rules.json')
+    risk = copy.deepcopy(Bot.DEFAULT_RULES['risk'])
+    risk['levels']['thresholds'] = [1, 4, 7, 10]
+    write_rules(path, {'risk': risk}, 1_000_000)
+
+    engine = Bot.RuleEngine(path)
+    assert filter_names(engine) == [rule['name'] for rule in Bot.DEFAULT_RULES['filters']]
+    assert engine.levels[0] == [1, 4, 7, 10]
+    assert engine.max_age_minutes == Bot.MAX_TOKEN_AGE_MINUTES
+
+
+def test_empty_filter_list_keeps_previous_rules(tmp_path):
+    path = str(tmp_path / 'rules.json')
+    config = copy.deepcopy(Bot.DEFAULT_RULES)
+    config['filters'] = config['filters'][:3]
+    write_rules(path, config, 1_000_000)
+    engine = Bot.RuleEngine(path)
+    assert len(engine.filters) == 3
+
+    write_rules(path, {'filters': [], 'risk': Bot.DEFAULT_RULES['risk']}, 1_000_100)
+    assert not engine.maybe_reload()
+    assert len(engine.filters) == 3
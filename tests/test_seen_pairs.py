@@ -0,0 +1,48 @@
+import copy
+
+import pytest
+
+import Bot
+
+
+def rules_with_age_limit(value):
+    config = copy.deepcopy(Bot.DEFAULT_RULES)
+    config['filters'] = [rule for rule in config['filters'] if rule['name'] != "Too old"]
+    if value is not None:
+        config['filters'].append({'name': "Too old", 'column': 'age_minutes', 'op': '>', 'value': value})
+    return config
+
+
+@pytest.mark.parametrize('limit, age, expected_minutes', [
+    ('$MAX_TOKEN_AGE_MINUTES', 10.0, Bot.MAX_TOKEN_AGE_MINUTES - 10),
+    (120, 40.0, 80),
+    (None, 40.0, Bot.SEEN_PAIRS_TTL_MINUTES),
+])
+def test_seen_pairs_follow_the_rule_age_limit(limit, age, expected_minutes):
+    engine = Bot.RuleEngine(path='/nonexistent/rules.json')
+    engine.install(rules_with_age_limit(limit))
+    seen = Bot.SeenPairs()
+
+    now = 1_000_000.0
+    seen.add('P1', age, engine.max_age_minutes, seen_at=now)
+    slack = 0 if limit is None else seen.CLOCK_SLACK_SECONDS
+    assert seen.entries['P1'] == pytest.approx(now + expected_minutes * 60 + slack)
+
+
+def test_unknown_age_uses_ttl():
+    seen = Bot.SeenPairs()
+    seen.add('P1', None, 30.0, seen_at=0.0)
+    assert seen.entries['P1'] == seen.ttl_seconds
+
+
+def test_state_store_round_trip(tmp_path):
+    store = Bot.BotStateStore(str(tmp_path / 'state.db'))
+    seen = Bot.SeenPairs()
+    seen.add('old', 30.0, 30.0, seen_at=100.0)
+    seen.add('new', None, 30.0, seen_at=200.0)
+    store.save(seen.take_unsaved(), {}, now=170.0)
+
+    restored = Bot.SeenPairs()
+    restored.load(store.load_seen_pairs(now=200.0))
+    store.close()
+    assert list(restored.entries) == ['new']
@@ -0,0 +1,156 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import Bot
+
+PRIMARY = '1000'
+GROUP = '-100200'
+
+
+class FakeMessage:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+def command_update(user_id, chat_id=GROUP):
+    return SimpleNamespace(
+        effective_user=SimpleNamespace(id=user_id),
+        effective_chat=SimpleNamespace(id=chat_id),
+        message=FakeMessage(),
+    )
+
+
+def run_command(handler, crypto_bot, update, *args):
+    context = SimpleNamespace(bot_data={'crypto_bot': crypto_bot}, args=list(args))
+    asyncio.run(handler(update, context))
+    return update.message.replies[-1]
+
+
+@pytest.fixture
+def admins(monkeypatch):
+    monkeypatch.setattr(Bot, 'SUBSCRIPTION_ADMIN_IDS', frozenset({'42'}))
+    monkeypatch.setattr(Bot, 'MAX_SUBSCRIPTIONS', 3)
+
+
+def test_subscribe_requires_allowlisted_user(crypto_bot, admins):
+    reply = run_command(Bot.subscribe_command, crypto_bot, command_update(7))
+    assert 'not allowed' in reply
+    assert GROUP not in crypto_bot.subscriptions.subscriptions
+
+    reply = run_command(Bot.unsubscribe_command, crypto_bot, command_update(7, PRIMARY))
+    assert 'not allowed' in reply
+
+
+def test_subscribe_rejects_partial_windows(crypto_bot, admins):
+    for args in (['5000'], ['1', '2', '3', '4'], ['nan', '5000'], ['9000', '5000']):
+        reply = run_command(Bot.subscribe_command, crypto_bot, command_update(42), *args)
+        assert reply.startswith('Usage:')
+    assert GROUP not in crypto_bot.subscriptions.subscriptions
+
+    reply = run_command(Bot.subscribe_command, crypto_bot, command_update(42), '5000', '20000')
+    assert reply.startswith('✅')
+    assert crypto_bot.subscriptions.subscriptions[GROUP].max_market_cap == 20000
+
+
+def test_subscriber_cap(crypto_bot, admins):
+    for chat_id in ('-1', '-2'):
+        run_command(Bot.subscribe_command, crypto_bot, command_update(42, chat_id))
+    assert len(crypto_bot.subscriptions) == 3
+
+    reply = run_command(Bot.subscribe_command, crypto_bot, command_update(42, '-3'))
+    assert 'limit' in reply
+    # Changing an existing window is still allowed at the cap
+    reply = run_command(Bot.subscribe_command, crypto_bot, command_update(42, '-1'), '1000', '2000')
+    assert reply.startswith('✅')
+
+
+def test_slow_subscriber_does_not_hold_back_alerts(crypto_bot, make_pair):
+    sent = []
+
+    async def send_message(chat_id, text, **kwargs):
+        sent.append((chat_id, time.perf_counter()))
+
+    async def scenario():
+        crypto_bot.outbox.send_message = send_message
+        # The configured chat is fast; the group only gets one message per second
+        crypto_bot.outbox.chat_buckets[PRIMARY] = Bot.TokenBucket(60000, burst_seconds=0)
+        crypto_bot.outbox.chat_buckets[GROUP] = Bot.TokenBucket(60, burst_seconds=0)
+
+        scan_ms = Bot.now_ms()
+        snapshots = crypto_bot.normalize_pairs([make_pair(i, scan_ms) for i in range(3)], scan_ms)
+        crypto_bot.score_pairs(snapshots)
+        ranking = Bot.RankedPairs(3)
+        for snap in snapshots:
+            snap.chat_ids = [PRIMARY, GROUP]
+            ranking.push(snap)
+        ranking.close()
+
+        started = time.perf_counter()
+        scan = {'queued': 0}
+        await crypto_bot.notify_stage(ranking, scan)
+        notify_seconds = time.perf_counter() - started
+        await crypto_bot.outbox.stop()
+        return scan, notify_seconds
+
+    scan, notify_seconds = asyncio.run(scenario())
+    assert scan['queued'] == 3
+    assert notify_seconds < 1.0
+    assert [chat_id for chat_id, _ in sent].count(PRIMARY) == 3
+    assert [chat_id for chat_id, _ in sent].count(GROUP) == 3
+
+
+def test_unsent_pairs_are_deferred_not_marked_processed(crypto_bot, make_pair, monkeypatch):
+    monkeypatch.setattr(Bot, 'TELEGRAM_CHAT_BACKLOG', 1)
+    sent = []
+
+    async def send_message(chat_id, text, **kwargs):
+        sent.append(chat_id)
+
+    async def scenario():
+        crypto_bot.outbox.send_message = send_message
+        # Hold the group's lane so it stays backlogged for the whole scan
+        crypto_bot.outbox.chat_buckets[GROUP] = Bot.TokenBucket(60, burst_seconds=0)
+        crypto_bot.outbox.chat_buckets[GROUP].block_for(60)
+        crypto_bot.queue_telegram_message("earlier alert", chat_id=GROUP)
+        await asyncio.sleep(0)
+        crypto_bot.queue_telegram_message("earlier alert", chat_id=GROUP)
+
+        scan_ms = Bot.now_ms()
+        snapshots = crypto_bot.normalize_pairs([make_pair(i, scan_ms) for i in range(3)], scan_ms)
+        crypto_bot.score_pairs(snapshots)
+        unformattable, backlogged, deliverable = snapshots
+        unformattable.chat_ids = [PRIMARY]
+        backlogged.chat_ids = [GROUP]
+        deliverable.chat_ids = [PRIMARY]
+        original_format = crypto_bot.format_enhanced_message
+        monkeypatch.setattr(crypto_bot, 'format_enhanced_message',
+                            lambda snap: (None, None) if snap is unformattable else original_format(snap))
+
+        # Two slots; the deliverable pair arrives after both were spent on pairs that could not be sent
+        ranking = Bot.RankedPairs(2)
+        ranking.push(unformattable)
+        ranking.push(backlogged)
+
+        async def late_source():
+            await asyncio.sleep(0.05)
+            ranking.push(deliverable)
+            ranking.close()
+
+        scan = {'queued': 0}
+        await asyncio.gather(crypto_bot.notify_stage(ranking, scan), late_source())
+        await crypto_bot.outbox.stop(timeout=0.1)
+        return scan, ranking, snapshots
+
+    scan, ranking, (unformattable, backlogged, deliverable) = asyncio.run(scenario())
+    assert scan['queued'] == 1
+    assert ranking.evicted == 2
+    assert sent == [PRIMARY]
+    assert deliverable.pair_id in crypto_bot.processed_pairs
+    assert unformattable.pair_id not in crypto_bot.processed_pairs
+    assert backlogged.pair_id not in crypto_bot.processed_pairs